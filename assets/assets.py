@@ -1,13 +1,34 @@
 import pygame
 import os
+import struct
+from collections import OrderedDict
 import settings
 
 # ASSET MANAGER
 
+PIECES = ['wp', 'wr', 'wn', 'wb', 'wq', 'wk', 'bp', 'br', 'bn', 'bb', 'bq', 'bk']
+
+# atlas file: magic, piece size, piece count, then raw rgba rows of all pieces stacked vertically
+ATLAS_MAGIC = b'CATL'
+ATLAS_HEADER = struct.Struct('<4sHH')
+
+
+def piece_key(filename):
+    # key example: 'P' for white pawn, 'p' for black pawn
+    return filename[1].upper() if filename.startswith('w') else filename[1]
+
+
+def _ready(surface):
+    # pixel format matching the display blits fastest; needs a video mode to exist
+    return surface.convert_alpha() if pygame.display.get_surface() else surface
+
+
 class AssetManager:
     def __init__(self):
-        self.original_images = {}
+        self.original_images = {}  # masters at settings.ATLAS_PIECE_SIZE
+        self.full_images = {}  # full-size pngs, only loaded for very large squares
         self.scaled_images = {}
+        self.scale_cache = OrderedDict()  # sq_size -> sprite set, least recently used first
         self.sounds = {}
         self.placeholder_font = None
 
@@ -19,38 +40,110 @@ class AssetManager:
             if os.path.exists(path):
                 self.sounds[name] = pygame.mixer.Sound(path)
 
-        # images
-        pieces = ['wp', 'wr', 'wn', 'wb', 'wq', 'wk', 'bp', 'br', 'bn', 'bb', 'bq', 'bk']
-        for filename in pieces:
-            # key example: 'P' for white pawn, 'p' for black pawn
-            key = filename[1].upper() if filename.startswith('w') else filename[1]
+        # images, from the atlas when it is up to date
+        if not self._load_atlas():
+            self.full_images = self._load_pngs()
+            size = settings.ATLAS_PIECE_SIZE
+            for key, img in self.full_images.items():
+                self.original_images[key] = pygame.transform.smoothscale(img, (size, size)) if img else None
+            self._save_atlas()
+            self.full_images.clear()
+
+    def _load_pngs(self):
+        images = {}
+        for filename in PIECES:
             path = os.path.join(settings.IMAGE_DIR, f"{filename}.png")
-            if os.path.exists(path):
-                self.original_images[key] = pygame.image.load(path)
-            else:
-                self.original_images[key] = None
+            images[piece_key(filename)] = pygame.image.load(path) if os.path.exists(path) else None
+        return images
+
+    def _atlas_is_fresh(self):
+        if not os.path.exists(settings.ATLAS_PATH): return False
+        atlas_time = os.path.getmtime(settings.ATLAS_PATH)
+        for filename in PIECES:
+            path = os.path.join(settings.IMAGE_DIR, f"{filename}.png")
+            if not os.path.exists(path) or os.path.getmtime(path) > atlas_time:
+                return False
+        return True
+
+    def _load_atlas(self):
+        if not self._atlas_is_fresh(): return False
+        with open(settings.ATLAS_PATH, 'rb') as f:
+            data = f.read()
+        if len(data) < ATLAS_HEADER.size: return False
+
+        magic, size, count = ATLAS_HEADER.unpack_from(data)
+        pixels = data[ATLAS_HEADER.size:]
+        if magic != ATLAS_MAGIC or size != settings.ATLAS_PIECE_SIZE or count != len(PIECES) or len(pixels) != size * size * 4 * count:
+            return False
+
+        atlas = pygame.image.frombytes(pixels, (size, size * count), 'RGBA')
+        for i, filename in enumerate(PIECES):
+            self.original_images[piece_key(filename)] = atlas.subsurface((0, i * size, size, size)).copy()
+        return True
+
+    def _save_atlas(self):
+        # only a complete piece set is worth caching
+        if any(self.original_images.get(piece_key(f)) is None for f in PIECES): return
+
+        size = settings.ATLAS_PIECE_SIZE
+        atlas = pygame.Surface((size, size * len(PIECES)), pygame.SRCALPHA)
+        for i, filename in enumerate(PIECES):
+            atlas.blit(self.original_images[piece_key(filename)], (0, i * size))
+
+        # write then rename so a half-written atlas is never read
+        tmp_path = settings.ATLAS_PATH + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, size, len(PIECES)))
+                f.write(pygame.image.tobytes(atlas, 'RGBA'))
+            os.replace(tmp_path, settings.ATLAS_PATH)
+        except OSError:
+            pass
 
     def rescale_images(self, sq_size):
-        self.scaled_images.clear()
-        
-        # font for placeholders
-        self.placeholder_font = pygame.font.SysFont("Arial", int(sq_size * 0.4), bold=True)
+        # reuse a cached sprite set for this size
+        if sq_size in self.scale_cache:
+            self.scale_cache.move_to_end(sq_size)
+            self.scaled_images = self.scale_cache[sq_size]
+            return
+
+        # squares bigger than the atlas scale from the full-size pngs
+        sources = self.original_images
+        if sq_size > settings.ATLAS_PIECE_SIZE:
+            if not self.full_images:
+                self.full_images = self._load_pngs()
+            sources = self.full_images
 
-        for key, img in self.original_images.items():
+        self.scaled_images = {}
+        for key, img in sources.items():
             if img:
-                self.scaled_images[key] = pygame.transform.smoothscale(img, (sq_size, sq_size))
+                self.scaled_images[key] = _ready(pygame.transform.smoothscale(img, (sq_size, sq_size)))
             else:
-                # generate text placeholder
+                # generate text placeholder, the font is only built when a png is missing
+                if self.placeholder_font is None or self.placeholder_font[0] != sq_size:
+                    self.placeholder_font = (sq_size, pygame.font.SysFont("Arial", int(sq_size * 0.4), bold=True))
                 s = pygame.Surface((sq_size, sq_size), pygame.SRCALPHA)
                 color = settings.BLACK if key.islower() else settings.WHITE
-                text = self.placeholder_font.render(key, True, color)
+                text = self.placeholder_font[1].render(key, True, color)
                 rect = text.get_rect(center=(sq_size//2, sq_size//2))
                 s.blit(text, rect)
-                self.scaled_images[key] = s
+                self.scaled_images[key] = _ready(s)
+
+        self.scale_cache[sq_size] = self.scaled_images
+        while len(self.scale_cache) > settings.SCALE_CACHE_SIZE:
+            self.scale_cache.popitem(last=False)
 
     def get_image(self, piece_symbol):
         return self.scaled_images.get(piece_symbol)
 
+    def get_rotated_image(self, piece_symbol, angle):
+        # rotations are kept with the sprite set they came from
+        key = (piece_symbol, angle)
+        if key not in self.scaled_images:
+            img = self.scaled_images.get(piece_symbol)
+            self.scaled_images[key] = pygame.transform.rotate(img, angle) if img else None
+        return self.scaled_images[key]
+
     def play_sound(self, name):
         if name in self.sounds:
             self.sounds[name].play()
\ No newline at end of file
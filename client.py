@@ -0,0 +1,30 @@
+import argparse
+import settings
+from logic.agents import ServerAgent
+from main import ChessGame
+
+# SERVER CLIENT
+
+# the gui of main.py against a bot on a game server (python -m logic.server):
+# the human side is local, the bot's searches run on the server's pool
+
+
+if __name__ == "__main__":
+    # python client.py --bot "MinimaxBot(8, time_limit=5)" --color black --time 300 --inc 3
+    parser = argparse.ArgumentParser(description="play a bot hosted on a game server")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--bot", default="MinimaxBot(8, time_limit=5)", help="agent spec the server runs")
+    parser.add_argument("--color", choices=['white', 'black'], default='white', help="the human's color")
+    parser.add_argument("--time", type=float, default=settings.CLOCK_BASE, help="seconds per side, 0 for untimed")
+    parser.add_argument("--inc", type=float, default=settings.CLOCK_INCREMENT)
+    parser.add_argument("--move-time", type=float, default=None, help="seconds per bot move")
+    options = parser.parse_args()
+
+    base_time = options.time or None
+    bot = ServerAgent(options.bot, options.host, options.port, base_time, options.inc, options.move_time)
+    if options.color == 'white':
+        game = ChessGame(black_agent=bot, base_time=base_time, increment=options.inc)
+    else:
+        game = ChessGame(white_agent=bot, base_time=base_time, increment=options.inc)
+    game.run()
\ No newline at end of file
@@ -1,20 +1,94 @@
+import json
+import queue
 import random
+import shlex
+import socket
+import subprocess
+import threading
 import time
 import chess
+from logic import parallel
+from logic.bitbases import Bitbases, BITBASE_DIR, DRAW
+from logic.bitboard import BitboardPosition
+from logic.book import OpeningBook
+from logic.evaluation import Evaluator, MATE_SCORE, BITBASE_WIN, PIECE_VALUES
+from logic.position import Position
+from logic.stats import SearchStats
+from logic.transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+INFINITY = 99999
+
+# search backends: python-chess with incremental key/score, or the
+# internal bitboard generator
+BACKENDS = {'python-chess': Position, 'bitboard': BitboardPosition}
+
+# quiescence search
+QUIESCENCE_MAX_PLY = 8
+DELTA_MARGIN = 2  # pawns
+
+# iterative deepening
+TIME_CHECK_NODES = 1024
+MOVES_TO_GO = 30
+
+# move ordering buckets
+HASH_MOVE_SCORE = 2000000
+CAPTURE_SCORE = 1000000
+KILLER_SCORE = 900000
+
+class SearchTimeout(Exception):
+    pass
 
 # AGENT INTERFACE
 
+class CancelToken:
+    # set from another thread to stop a search; any event with set/is_set
+    # works, so worker processes can share one through multiprocessing
+    def __init__(self, event=None):
+        self.event = event or threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def wait(self, seconds):
+        # sleeps, returning True early if cancelled
+        return self.event.wait(seconds)
+
 class Agent:
     def __init__(self):
         self.color = None
+        
+        # game clock, in seconds (None when the game is untimed)
+        self.time_left = None
+        self.increment = 0
+        
+        # pgn result of a game the agent's side ended itself (a remote bot
+        # flagged or resigned), None while the board decides
+        self.result = None
 
     def set_color(self, color):
         self.color = color
 
-    def get_move(self, board_obj):
-        # return ((start_row, start_col), (end_row, end_col)) or None
+    def set_clock(self, time_left, increment):
+        self.time_left = time_left
+        self.increment = increment
+
+    def get_move(self, board_obj, token=None):
+        # return ((start_row, start_col), (end_row, end_col)) or None;
+        # a cancelled token asks for an early return with the best move so far
         raise NotImplementedError
 
+    def ponder(self, board_obj):
+        # called after the agent's own move, while the opponent thinks
+        pass
+
+    def stop(self):
+        # stops any background work (pondering)
+        pass
+
 
 
 
@@ -34,7 +108,7 @@ class RandomBot(Agent):
         super().__init__()
         self.wait_time = wait_time
 
-    def get_move(self, board_obj):
+    def get_move(self, board_obj, token=None):
         legal_moves = list(board_obj.engine.legal_moves)
         
         if not legal_moves:
@@ -47,7 +121,7 @@ class RandomBot(Agent):
         er = 7 - chess.square_rank(move.to_square)
         ec = chess.square_file(move.to_square)
         
-        time.sleep(self.wait_time)
+        (token or CancelToken()).wait(self.wait_time)
         return (sr, sc), (er, ec)
     
 
@@ -58,90 +132,683 @@ class RandomBot(Agent):
 
 
 class MinimaxBot(Agent):
-    def __init__(self, depth):
+    def __init__(self, depth, tt_size_mb=16, use_pst=True, workers=1, time_limit=None,
+                 quiescence=True, max_qnodes=200000, backend='bitboard', book=None,
+                 bitbase_dir=BITBASE_DIR, on_stats=None, ponder=False):
         super().__init__()
+        # depth is the deepest iteration, time_limit caps seconds per move
         self.depth = depth
-        self.piece_values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
+        self.time_limit = time_limit
+        self.tt_size_mb = tt_size_mb
+        self.use_pst = use_pst
+        self.evaluator = Evaluator(use_pst)
+        
+        # captures-only search at the leaves, capped per move
+        self.quiescence = quiescence
+        self.max_qnodes = max_qnodes
+        self.backend = backend
+        
+        # opening book file, probed before any search
+        self.book = OpeningBook(book) if book else None
+        
+        # endgame bitbases found in bitbase_dir (none until generated)
+        self.bitbase_dir = bitbase_dir
+        self.bitbases = Bitbases(bitbase_dir) if bitbase_dir else None
+        
+        # workers > 1 splits the root moves over a process pool
+        self.workers = workers
+        self.pool = None
+        self.pool_stop = None
+        
+        # move ordering state
+        self.killers = []
+        self.history = {}
+        
+        # kept for the whole game so later moves reuse earlier work
+        self.tt = TranspositionTable(tt_size_mb)
+        
+        # search state
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.tt_cutoffs = 0
+        self.worker_tt_probes = 0
+        self.worker_tt_hits = 0
+        self.deadline = None
+        self.budget = None
+        self.search_start = 0.0
+        self.search_started = threading.Event()  # set when a search has its budget and start
+        self.token = CancelToken()
+        self.root_best = (None, -INFINITY)
+        
+        # pondering: searching the expected reply on the opponent's time
+        self.pondering = ponder
+        self.ponder_thread = None
+        self.ponder_token = None
+        self.ponder_fen = None
+        self.ponder_result = None
+        
+        # stats of the last search, passed to on_stats after every iteration
+        self.stats = None
+        self.on_stats = on_stats
+
+    def get_move(self, board_obj, token=None):
+        if not any(board_obj.engine.legal_moves):
+            return None
+        
+        # the opponent played the expected reply: the ponder search goes on
+        # with a real deadline, otherwise it is dropped
+        if self.ponder_thread:
+            if board_obj.engine.fen() == self.ponder_fen and not (token and token.cancelled):
+                best_move = self.ponder_hit(token)
+            else:
+                best_move = None
+                self.stop()
+            if best_move:
+                return self.to_coords(best_move)
+        
+        best_move = self.choose_move(board_obj.engine, token or CancelToken(), self.allocate_time())
+        return self.to_coords(best_move) if best_move else None
+
+    def choose_move(self, engine, token, budget):
+        # book, bitbases, then iterative deepening; a cancel ends the search
+        # like a timeout
+        self.token = token
+        self.new_search(self.depth)
+        self.stats = SearchStats(self)
+        
+        # in book: play a weighted random book move without searching
+        best_move = self.book.choose(engine) if self.book else None
+        if best_move:
+            self.stats.source = 'book'
+            self.report(best_move)
+            return best_move
+        
+        # in a won or lost table ending: fastest mate / longest defence
+        best_move = self.bitbases.best_move(engine) if self.bitbases else None
+        if best_move:
+            self.stats.source = 'bitbase'
+            self.report(best_move)
+            return best_move
+        
+        # root moves in python-chess order, whatever the backend, so ties
+        # are broken the same way
+        board = self.make_position(engine)
+        legal_moves = list(engine.legal_moves)
+        self.budget = budget
+        self.search_start = time.time()
+        self.search_started.set()
+        
+        entry = self.tt.probe(board.key)
+        best_move = entry[3] if entry else None
+
+        # ties go to the move generated first, same as plain minimax
+        index = {move: i for i, move in enumerate(legal_moves)}
+
+        # iterative deepening: each iteration searches the previous best first
+        for depth in range(1, self.depth + 1):
+            # the first iteration always finishes so there is a move to play;
+            # budget and start are re-read because a ponder hit sets them
+            self.deadline = self.search_start + self.budget if self.budget and depth > 1 else None
+            self.root_best = (None, -INFINITY)
+            ordered = self.order_moves(board, legal_moves, 0, best_move)
+            
+            try:
+                if self.workers > 1:
+                    move, value = parallel.search_root(self, board, ordered, depth, index)
+                else:
+                    move, value = self.search_root(board, ordered, depth, index)
+            except SearchTimeout:
+                # a move that beat the previous best in the cut iteration is
+                # still a proven improvement
+                if self.root_best[0] is not None:
+                    best_move = self.root_best[0]
+                break
+            
+            best_move = move
+            self.tt.store(board.key, depth, EXACT, value, move)
+            self.stats.end_iteration(self, depth, value, self.principal_variation(board, depth))
+            if self.on_stats:
+                self.on_stats(self.stats)
+            
+            # stop early on a forced mate, or when the next iteration
+            # would not fit in what is left of the budget
+            if abs(value) >= MATE_SCORE:
+                break
+            if self.budget and time.time() - self.search_start > self.budget * 0.5:
+                break
+        
+        self.deadline = None
+        self.report(best_move)
+        return best_move
+
+    def ponder(self, board_obj):
+        # search the position after the expected reply (second move of our
+        # last principal variation) in the background, without a deadline
+        self.stop()
+        if not self.pondering or not self.stats or len(self.stats.pv) < 2:
+            return
+        engine = board_obj.engine
+        if not engine.move_stack or engine.peek() != self.stats.pv[0]:
+            return
+        reply = self.stats.pv[1]
+        if reply not in engine.legal_moves:
+            return
+        
+        engine = engine.copy()
+        engine.push(reply)
+        if engine.is_game_over():
+            return
+        self.ponder_fen = engine.fen()
+        self.ponder_token = CancelToken()
+        self.ponder_result = None
+        self.search_started.clear()
+        self.ponder_thread = threading.Thread(target=self._ponder_search, args=(engine, self.ponder_token), daemon=True)
+        self.ponder_thread.start()
+
+    def _ponder_search(self, engine, token):
+        self.ponder_result = self.choose_move(engine, token, None)
+
+    def ponder_hit(self, token):
+        # the ponder search goes on with this move's budget, counted from when
+        # pondering started: after a long ponder the move comes at once.
+        # the ponder thread must have set its own (empty) budget first, or it
+        # would overwrite this one; a book or bitbase move never sets it
+        while not self.search_started.wait(0.01):
+            if not self.ponder_thread.is_alive():
+                break
+        self.budget = self.allocate_time()
+        if self.budget and self.stats.depth:
+            self.deadline = self.search_start + self.budget
+        
+        # a cancel of this move is passed on to the ponder search
+        while self.ponder_thread.is_alive():
+            if token and token.cancelled:
+                self.ponder_token.cancel()
+            self.ponder_thread.join(0.05)
+        self.ponder_thread = None
+        if self.stats:
+            self.stats.source = 'ponder'
+        return self.ponder_result
+
+    def stop(self):
+        # cancel and wait for a running ponder search
+        if self.ponder_thread:
+            self.ponder_token.cancel()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+
+    def report(self, move):
+        # final stats of this move
+        self.stats.finish(self, move)
+        if self.on_stats:
+            self.on_stats(self.stats)
+
+    def principal_variation(self, board, depth):
+        # best line read back from the transposition table, stopping at a
+        # missing or illegal entry or a repeated position
+        pv = []
+        seen = set()
+        while len(pv) < depth and board.key not in seen:
+            seen.add(board.key)
+            entry = self.tt.probe(board.key)
+            move = entry[3] if entry else None
+            if move is None or move not in board.legal_moves:
+                break
+            board.push(move)
+            pv.append(move)
+        for _ in pv:
+            board.pop()
+        return pv
+
+    def to_coords(self, move):
+        sr = 7 - chess.square_rank(move.from_square)
+        sc = chess.square_file(move.from_square)
+        er = 7 - chess.square_rank(move.to_square)
+        ec = chess.square_file(move.to_square)
+        return (sr, sc), (er, ec)
+
+    def make_position(self, engine):
+        return BACKENDS[self.backend].from_board(engine, self.evaluator)
+
+    def new_search(self, depth):
+        self.killers = [[None, None] for _ in range(depth + 1)]
+        self.history = {}
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.tt_cutoffs = 0
+        # probes of the workers' own tables, in a parallel search
+        self.worker_tt_probes = 0
+        self.worker_tt_hits = 0
+        self.tt.new_search()
+
+    def search_options(self):
+        # constructor arguments that shape the search, for worker processes
+        return {
+            'depth': self.depth,
+            'tt_size_mb': self.tt_size_mb,
+            'use_pst': self.use_pst,
+            'quiescence': self.quiescence,
+            'max_qnodes': self.max_qnodes,
+            'backend': self.backend,
+            'bitbase_dir': self.bitbase_dir,
         }
 
-    def get_move(self, board_obj):
-        board = board_obj.engine.copy()
+    def allocate_time(self):
+        # seconds to spend on this move, None for a pure fixed-depth search
+        if self.time_left is None:
+            return self.time_limit
         
+        # an even share of the clock plus most of the increment, never
+        # more than a quarter of what is left
+        budget = self.time_left / MOVES_TO_GO + self.increment * 0.8
+        budget = min(budget, self.time_left * 0.25)
+        if self.time_limit:
+            budget = min(budget, self.time_limit)
+        return max(budget, 0.01)
+
+    def search_root(self, board, moves, depth, index, best_value=-INFINITY, best_index=None):
+        # returns (best_move, best_value); best_move stays None if nothing
+        # beats the incoming best_value / best_index pair
         best_move = None
-        best_value = -99999 if self.color == chess.WHITE else 99999
-        
-        legal_moves = list(board.legal_moves)
-        if not legal_moves:
-            return None
+        for move in moves:
+            tie_wins = best_index is not None and index[move] < best_index
+            alpha = best_value - 1 if tie_wins else best_value
 
-        # Loop through root moves
-        for move in legal_moves:
             board.push(move)
-            value = self.minimax(board, self.depth - 1, not (self.color == chess.WHITE))
+            value = -self.negamax(board, depth - 1, -INFINITY, -alpha, 1)
             board.pop()
             
-            if self.color == chess.WHITE:
-                if value > best_value:
-                    best_value = value
-                    best_move = move
-            else:
-                if value < best_value:
-                    best_value = value
-                    best_move = move
-        
-        if best_move:
-            sr = 7 - chess.square_rank(best_move.from_square)
-            sc = chess.square_file(best_move.from_square)
-            er = 7 - chess.square_rank(best_move.to_square)
-            ec = chess.square_file(best_move.to_square)
-            return (sr, sc), (er, ec)
-            
-        return None
+            if value > best_value or (tie_wins and value == best_value):
+                best_value = value
+                best_move = move
+                best_index = index[move]
+                self.root_best = (move, value)
+        return best_move, best_value
+
+    def close(self):
+        # stops pondering and the worker processes of the parallel mode, if any
+        self.stop()
+        parallel.shutdown(self)
 
     def evaluate_board(self, board):
-        if board.is_checkmate():
-            if board.turn == chess.WHITE:
-                return -9999
-            else:
-                return 9999
+        # the score is kept up to date by the position, so this is O(1) unless
+        # the side to move is out of legal moves
+        if not board.has_legal_moves():
+            return self.evaluate_terminal(board)
+        if board.is_automatic_draw():
+            return 0
+        return board.score
+
+    def bitbase_score(self, board):
+        # a proven win: more material first (so pawns promote), then the
+        # shorter way to mate
+        strong = chess.WHITE if board.occupied_co[chess.WHITE] & ~board.kings else chess.BLACK
+        score = BITBASE_WIN - self.bitbases.distance(board)
+        for piece_type in (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+            score += 100 * PIECE_VALUES[piece_type] * chess.popcount(board.pieces_mask(piece_type, strong))
+        return score
+
+    def evaluate_terminal(self, board):
+        # checkmate or stalemate
+        if board.is_check():
+            return -MATE_SCORE if board.turn == chess.WHITE else MATE_SCORE
+        return 0
+
+    def mvv_lva(self, board, move):
+        # most valuable victim first, then least valuable attacker
+        if board.is_capture(move):
+            victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+            attacker = board.piece_type_at(move.from_square)
+            return CAPTURE_SCORE + victim * 10 - attacker
+        if move.promotion:
+            return CAPTURE_SCORE + move.promotion * 10
+        return 0
+
+    def order_moves(self, board, moves, ply, tt_move=None):
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+
+        def score(move):
+            if move == tt_move:
+                return HASH_MOVE_SCORE
+            if board.is_capture(move) or move.promotion:
+                return self.mvv_lva(board, move)
+            if move in killers:
+                return KILLER_SCORE - killers.index(move)
+            return self.history.get((board.turn, move.from_square, move.to_square), 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def store_cutoff(self, board, move, depth, ply):
+        # quiet moves that refute a line get tried early in sibling nodes
+        if board.is_capture(move) or move.promotion:
+            return
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        key = (board.turn, move.from_square, move.to_square)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def should_stop(self):
+        # polled every TIME_CHECK_NODES nodes
+        return self.token.cancelled or (self.deadline is not None and time.time() >= self.deadline)
+
+    def negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes % TIME_CHECK_NODES and self.should_stop():
+            raise SearchTimeout()
+        
+        # endgame bitbases: a position that reaches a table is decided
+        if self.bitbases and ply > 0:
+            result = self.bitbases.probe(board)
+            if result is not None:
+                return result * self.bitbase_score(board) if result != DRAW else 0
         
-        if board.is_game_over():
+        # scores are from the point of view of the side to move
+        sign = 1 if board.turn == chess.WHITE else -1
+        if depth <= 0:
+            if self.quiescence:
+                return self.quiesce(board, alpha, beta, 0)
+            return sign * self.evaluate_board(board)
+
+        moves = list(board.legal_moves)
+        if not moves:
+            return sign * self.evaluate_terminal(board)
+        if board.is_automatic_draw():
             return 0
 
-        score = 0
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                value = self.piece_values.get(piece.piece_type, 0)
-                if piece.color == chess.WHITE:
-                    score += value
-                else:
-                    score -= value
-        return score
+        # transposition table cutoff
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.probe(board.key)
+        if entry:
+            tt_depth, bound, score, tt_move = entry
+            if tt_depth >= depth and (bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha)):
+                self.tt_cutoffs += 1
+                return score
+
+        best_value = -INFINITY
+        best_move = None
+        for i, move in enumerate(self.order_moves(board, moves, ply, tt_move)):
+            board.push(move)
+            value = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            
+            if value > best_value:
+                best_value = value
+                best_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.cutoffs += 1
+                self.first_cutoffs += i == 0
+                self.store_cutoff(board, move, depth, ply)
+                break
+
+        if best_value <= alpha_orig:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.tt.store(board.key, depth, bound, best_value, best_move)
+        return best_value
+
+    def quiesce(self, board, alpha, beta, qply):
+        # captures-only search so the static score is never taken in the
+        # middle of an exchange
+        self.qnodes += 1
+        if not self.qnodes % TIME_CHECK_NODES and self.should_stop():
+            raise SearchTimeout()
+        
+        sign = 1 if board.turn == chess.WHITE else -1
+        in_check = board.is_check()
+        
+        # the main-search leaf keeps the full terminal and draw checks
+        if qply == 0:
+            if not board.has_legal_moves():
+                return sign * self.evaluate_terminal(board)
+            if board.is_automatic_draw():
+                return 0
+        
+        if in_check:
+            # no standing pat while in check, every evasion is tried
+            moves = list(board.legal_moves)
+            if not moves:
+                return sign * self.evaluate_terminal(board)
+            best_value = -INFINITY
+        else:
+            # stand pat: the side to move may decline every capture
+            stand_pat = best_value = sign * board.score
+            if best_value >= beta or qply >= QUIESCENCE_MAX_PLY or self.qnodes >= self.max_qnodes:
+                return best_value
+            alpha = max(alpha, best_value)
+            
+            moves = board.tactical_moves()
+        
+        material = self.evaluator.material
+        margin = DELTA_MARGIN * self.evaluator.unit
+        for move in sorted(moves, key=lambda move: self.mvv_lva(board, move), reverse=True):
+            if not in_check:
+                # delta pruning: even winning the piece cannot reach alpha
+                if not move.promotion:
+                    captured = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+                    if stand_pat + material[captured] + margin <= alpha:
+                        continue
+                # losing exchanges are not worth searching
+                if board.see(move) < 0:
+                    continue
+            
+            board.push(move)
+            value = -self.quiesce(board, -beta, -alpha, qply + 1)
+            board.pop()
+            
+            if value > best_value:
+                best_value = value
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+        return best_value
 
-    def minimax(self, board, depth, search_max):
-        if depth <= 0 or board.is_game_over():
-            return self.evaluate_board(board)
-
-        if search_max:
-            max_value = -99999
-            for move in board.legal_moves:
-                board.push(move)
-                value = self.minimax(board, depth - 1, False)
-                board.pop()
-                max_value = max(max_value, value)
-            return max_value
+
+# UCI ENGINES
+
+class UciAgent(Agent):
+    # any uci engine as a subprocess, e.g. UciAgent("python -m logic.uci 'MinimaxBot(8)'")
+    # or UciAgent("stockfish"); the search runs outside this process and its GIL
+    def __init__(self, command, depth=None, movetime=None, cwd=None):
+        super().__init__()
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.depth = depth
+        self.movetime = movetime  # ms per move, used when the game is untimed
+        self.cwd = cwd
+        self.process = None
+        self.lines = queue.Queue()
+        self.info = None  # last info line of the engine
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1, cwd=self.cwd)
+        # a reader thread, so waiting for output can also watch for a cancel
+        threading.Thread(target=self._read, args=(self.process.stdout,), daemon=True).start()
+        self.send("uci")
+        self.wait_for("uciok")
+        self.send("isready")
+        self.wait_for("readyok")
+
+    def _read(self, stdout):
+        for line in stdout:
+            self.lines.put(line.strip())
+        self.lines.put(None)
+
+    def send(self, line):
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+
+    def wait_for(self, prefix, token=None):
+        # next line starting with prefix; sends stop once if the token is cancelled
+        stopped = False
+        while True:
+            try:
+                line = self.lines.get(timeout=0.05)
+            except queue.Empty:
+                if token and token.cancelled and not stopped:
+                    self.send("stop")
+                    stopped = True
+                continue
+            if line is None:
+                raise RuntimeError(f"uci engine exited: {self.command}")
+            if line.startswith("info") and " pv " in line:
+                self.info = line
+            if line.startswith(prefix):
+                return line
+
+    def get_move(self, board_obj, token=None):
+        engine = board_obj.engine
+        if not any(engine.legal_moves):
+            return None
+        if self.process is None:
+            self.start()
+        
+        root = engine.root()
+        moves = " ".join(move.uci() for move in engine.move_stack)
+        position = "startpos" if root.fen() == chess.STARTING_FEN else f"fen {root.fen()}"
+        self.send(f"position {position} moves {moves}" if moves else f"position {position}")
+        
+        # the engine gets our clock for both sides, only its own is known here
+        if self.time_left is not None:
+            ms, inc = int(self.time_left * 1000), int(self.increment * 1000)
+            self.send(f"go wtime {ms} btime {ms} winc {inc} binc {inc}")
+        elif self.depth:
+            self.send(f"go depth {self.depth}")
         else:
-            min_value = 99999
-            for move in board.legal_moves:
-                board.push(move)
-                value = self.minimax(board, depth - 1, True)
-                board.pop()
-                min_value = min(min_value, value)
-            return min_value
\ No newline at end of file
+            self.send(f"go movetime {self.movetime or 1000}")
+        
+        line = self.wait_for("bestmove", token)
+        move = chess.Move.from_uci(line.split()[1]) if len(line.split()) > 1 and line.split()[1] != "0000" else None
+        if move is None or move not in engine.legal_moves:
+            return None
+        sr, sc = 7 - chess.square_rank(move.from_square), chess.square_file(move.from_square)
+        er, ec = 7 - chess.square_rank(move.to_square), chess.square_file(move.to_square)
+        return (sr, sc), (er, ec)
+
+    def close(self):
+        if self.process is None: return
+        try:
+            self.send("quit")
+            self.process.wait(2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
+
+
+# GAME SERVER
+
+class ServerAgent(Agent):
+    # the opponent is a bot on a logic.server game server: the first move
+    # creates the game there, then local moves are sent and the bot's replies
+    # come back, so the search runs on the server's worker pool
+    def __init__(self, spec, host='127.0.0.1', port=8765, base_time=None, increment=0, move_time=None):
+        super().__init__()
+        self.spec = spec
+        self.address = (host, port)
+        self.base_time = base_time
+        self.increment = increment
+        self.move_time = move_time
+        self.sock = None
+        self.buffer = b''
+        self.events = []  # move events that arrived while waiting for a reply
+        self.game = None
+        self.synced = 0  # plies the server already has
+
+    def send(self, request):
+        self.sock.sendall((json.dumps(request) + "\n").encode())
+
+    def receive(self, token=None):
+        # next message; None if the token is cancelled while waiting
+        while b"\n" not in self.buffer:
+            if token and token.cancelled:
+                return None
+            try:
+                data = self.sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not data:
+                raise ConnectionError("game server closed the connection")
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return json.loads(line)
+
+    def request(self, request):
+        # replies are matched by op; move events arriving meanwhile are kept.
+        # an error is only raised while the game is still on
+        self.send(request)
+        while True:
+            message = self.receive()
+            if 'event' in message:
+                self.take_event(message)
+                self.events.append(message)
+            elif not message.get('ok') and self.result is None:
+                raise RuntimeError(f"game server: {message.get('error')}")
+            else:
+                return message
+
+    def take_event(self, message):
+        # keeps the result of a game the server ended without a move (a flag,
+        # a failed search, a resign); games ended by a move the board sees itself
+        if message.get('event') == 'move' and message.get('game') == self.game and message['result'] and not message['move']:
+            self.result = message['result']
+
+    def get_move(self, board_obj, token=None):
+        engine = board_obj.engine
+        if not any(engine.legal_moves) or self.result:
+            return None
+        if self.sock is None:
+            self.sock = socket.create_connection(self.address)
+            self.sock.settimeout(0.05)
+            players = {'white': 'human', 'black': 'human'}
+            players['white' if self.color == chess.WHITE else 'black'] = self.spec
+            new_game = {'op': 'new_game', **players, 'time': self.base_time, 'increment': self.increment}
+            if self.move_time:
+                new_game['move_time'] = self.move_time
+            self.game = self.request(new_game)['game']
+
+        # moves played here since the last sync (the other side's)
+        for move in engine.move_stack[self.synced:]:
+            self.request({'op': 'move', 'game': self.game, 'move': move.uci()})
+            if self.result:
+                return None
+        self.synced = len(engine.move_stack)
+
+        # wait for the server bot's move
+        while True:
+            message = self.events.pop(0) if self.events else self.receive(token)
+            if message is None:
+                return None
+            if message.get('event') != 'move' or message.get('game') != self.game:
+                continue
+            self.take_event(message)
+            if self.result:
+                return None
+            if message['ply'] == self.synced + 1 and message['move']:
+                break
+        self.synced += 1
+        move = chess.Move.from_uci(message['move'])
+        sr, sc = 7 - chess.square_rank(move.from_square), chess.square_file(move.from_square)
+        er, ec = 7 - chess.square_rank(move.to_square), chess.square_file(move.to_square)
+        return (sr, sc), (er, ec)
+
+    def close(self):
+        if self.sock is None: return
+        try:
+            if self.game is not None:
+                self.send({'op': 'resign', 'game': self.game, 'color': 'white' if self.color != chess.WHITE else 'black'})
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
\ No newline at end of file
@@ -0,0 +1,226 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import chess
+import chess.pgn
+from logic.agents import MinimaxBot, CancelToken
+from logic.batch import BatchEvaluator
+
+# BATCH ANALYSIS
+
+CHUNK_SIZE = 16  # positions per task sent to a worker
+WINDOW = 4  # chunks in flight per worker, bounds memory whatever the input size
+REPORT_SECONDS = 5.0
+STATIC_BATCH = 1024  # positions per numpy call in static mode
+
+# each worker keeps one bot, its transposition table carries over between
+# positions (consecutive positions of a game share a lot)
+_worker_bot = None
+
+
+# INPUT
+
+def read_fens(f, name):
+    # one fen (or epd: the first four fields) per line; blank lines and # comments skipped
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = line.split()
+        fen = " ".join(fields[:6]) if len(fields) >= 6 and fields[4].isdigit() else " ".join(fields[:4])
+        yield f"{name}:{line_no}", fen
+
+
+def read_pgn(f, name, final_only=False):
+    # every position of each game's main line before a move, or only the last one
+    game_no = 0
+    while True:
+        game = chess.pgn.read_game(f)
+        if game is None:
+            break
+        game_no += 1
+        board = game.board()
+        for ply, move in enumerate(game.mainline_moves()):
+            if not final_only:
+                yield f"{name}:{game_no}:{ply}", board.fen()
+            board.push(move)
+        if final_only:
+            yield f"{name}:{game_no}", board.fen()
+
+
+def read_positions(paths, final_only=False):
+    # lazily, file after file; '-' is stdin (fens)
+    for path in paths:
+        if path == '-':
+            yield from read_fens(sys.stdin, 'stdin')
+            continue
+        with open(path, encoding='utf-8', errors='replace') as f:
+            if path.lower().endswith('.pgn'):
+                yield from read_pgn(f, path, final_only)
+            else:
+                yield from read_fens(f, path)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# SEARCH
+
+def _init_worker(options):
+    global _worker_bot
+    _worker_bot = MinimaxBot(**options)
+
+
+def _analyse_chunk(chunk):
+    return [analyse_position(_worker_bot, position_id, fen) for position_id, fen in chunk]
+
+
+def parse_position(result):
+    # board of result['fen'], or None with result['error'] set
+    try:
+        engine = chess.Board(result['fen'])
+    except ValueError as e:
+        result['error'] = str(e)
+        return None
+    if not engine.is_valid():
+        # parses but can't be searched (no king, side not to move in check, ...)
+        status = engine.status()
+        result['error'] = "illegal position: " + ", ".join(flag.name.lower() for flag in chess.Status if flag and flag in status)
+        return None
+    return engine
+
+
+def analyse_position(bot, position_id, fen):
+    # one search; score in centipawns from the side to move
+    result = {'id': position_id, 'fen': fen}
+    engine = parse_position(result)
+    if engine is None:
+        return result
+
+    start = time.perf_counter()
+    if not any(engine.legal_moves):
+        # mated or stalemated, nothing to search
+        move, score, depth, nodes = None, '-mate' if engine.is_check() else 0, 0, 0
+    else:
+        move = bot.choose_move(engine, CancelToken(), bot.allocate_time())
+        stats = bot.stats
+        score, depth, nodes = stats.score_cp(stats.score), stats.depth, stats.nodes + stats.qnodes
+        result['source'] = stats.source
+
+    result.update({
+        'move': move.uci() if move else None,
+        'score': score,
+        'depth': depth,
+        'nodes': nodes,
+        'time': round(time.perf_counter() - start, 4),
+    })
+    return result
+
+
+def analyse(positions, depth, time_limit=None, workers=1, chunk_size=CHUNK_SIZE, **options):
+    # generator of results in input order; at most workers * WINDOW chunks
+    # are read ahead, so memory stays flat on any input size
+    options.update({'depth': depth, 'time_limit': time_limit})
+    if workers <= 1:
+        bot = MinimaxBot(**options)
+        for position_id, fen in positions:
+            yield analyse_position(bot, position_id, fen)
+        bot.close()
+        return
+
+    chunks = chunked(positions, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        pending = deque()
+        for chunk in itertools.islice(chunks, workers * WINDOW):
+            pending.append(pool.submit(_analyse_chunk, chunk))
+        while pending:
+            results = pending.popleft().result()
+            for chunk in itertools.islice(chunks, 1):
+                pending.append(pool.submit(_analyse_chunk, chunk))
+            yield from results
+
+
+def analyse_static(positions, batch_size=STATIC_BATCH):
+    # no search: the evaluator's static score of each position, scored a
+    # batch at a time by BatchEvaluator; centipawns from the side to move
+    batch = BatchEvaluator()
+    unit = batch.evaluator.unit
+    for chunk in chunked(positions, batch_size):
+        results = [{'id': position_id, 'fen': fen} for position_id, fen in chunk]
+        scored = []
+        for result in results:
+            engine = parse_position(result)
+            if engine:
+                scored.append((result, engine))
+        if scored:
+            scores = batch.evaluate([engine for _, engine in scored]).tolist()
+            for (result, engine), score in zip(scored, scores):
+                score = score if engine.turn == chess.WHITE else -score
+                result.update({'source': 'static', 'score': score * 100 // unit})
+        yield from results
+
+
+def run(paths, out, depth, time_limit=None, workers=1, final_only=False, report=sys.stderr, static=False):
+    # analyse everything, writing json lines to out; returns the totals
+    positions = nodes = 0
+    start = last_report = time.perf_counter()
+    if static:
+        results = analyse_static(read_positions(paths, final_only))
+    else:
+        results = analyse(read_positions(paths, final_only), depth, time_limit, workers)
+    for result in results:
+        out.write(json.dumps(result) + '\n')
+        positions += 1
+        nodes += result.get('nodes', 0)
+        now = time.perf_counter()
+        if report and now - last_report >= REPORT_SECONDS:
+            last_report = now
+            elapsed = now - start
+            report.write(f"{positions} positions, {positions / elapsed:.1f} pos/s, {nodes / elapsed:.0f} nodes/s\n")
+            report.flush()
+    out.flush()
+
+    elapsed = time.perf_counter() - start
+    totals = {
+        'positions': positions,
+        'nodes': nodes,
+        'time': elapsed,
+        'positions_per_sec': positions / elapsed if elapsed else 0.0,
+        'nodes_per_sec': nodes / elapsed if elapsed else 0.0,
+    }
+    if report:
+        report.write(f"done: {positions} positions in {elapsed:.1f}s, {totals['positions_per_sec']:.1f} pos/s, "
+                     f"{totals['nodes_per_sec']:.0f} nodes/s\n")
+    return totals
+
+
+if __name__ == "__main__":
+    # python -m logic.analysis positions.epd games.pgn --depth 4 --workers 4 -o results.jsonl
+    # python -m logic.analysis positions.epd --static -o scores.jsonl
+    parser = argparse.ArgumentParser(description="analyse fen/epd or pgn files with MinimaxBot")
+    parser.add_argument("inputs", nargs='+', help="fen/epd files, .pgn files, or - for stdin")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--time", type=float, default=None, help="seconds per position")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--final", action="store_true", help="pgn: only the final position of each game")
+    parser.add_argument("--static", action="store_true", help="static evaluation only, batched, no search")
+    parser.add_argument("-o", "--out", help="json lines output (default stdout)")
+    options = parser.parse_args()
+
+    out = open(options.out, 'w', encoding='utf-8') if options.out else sys.stdout
+    try:
+        run(options.inputs, out, options.depth, options.time, options.workers, options.final, static=options.static)
+    finally:
+        if options.out:
+            out.close()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import sys
+import time
+import numpy as np
+import chess
+from logic.evaluation import Evaluator
+
+# BATCH EVALUATION
+
+# plane order of the 12x64 tensor: white pawn..king, then black pawn..king
+PLANES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in range(chess.PAWN, chess.KING + 1)]
+
+
+def encode(boards):
+    # N positions -> (N, 12) uint64 piece bitboards; works on python-chess
+    # boards, Position and BitboardPosition
+    return np.array([[board.pieces_mask(piece_type, color) for color, piece_type in PLANES] for board in boards],
+                    dtype=np.uint64).reshape(-1, len(PLANES))
+
+
+def to_planes(bitboards):
+    # (N, 12) bitboards -> (N, 12, 64) 0/1 tensor, square a1 first
+    as_bytes = bitboards.astype('<u8').view(np.uint8).reshape(len(bitboards), len(PLANES), 8)
+    return np.unpackbits(as_bytes, axis=2, bitorder='little')
+
+
+class BatchEvaluator:
+    def __init__(self, evaluator=None):
+        # same material + piece-square scores as the scalar evaluator
+        self.evaluator = evaluator or Evaluator()
+        table = self.evaluator.table
+        self.weights = np.array([table[color][piece_type] for color, piece_type in PLANES], dtype=np.float32)
+        self.table = np.array(table, dtype=np.int64)  # [color][piece_type][square]
+
+    def evaluate(self, boards):
+        # white's point of view, one int per position; takes boards or encoded bitboards
+        bitboards = boards if isinstance(boards, np.ndarray) else encode(boards)
+        planes = to_planes(bitboards).reshape(len(bitboards), -1)
+        return np.rint(planes @ self.weights.reshape(-1)).astype(np.int64)
+
+    def child_scores(self, board, moves):
+        # static score after each move, from the parent's incremental score,
+        # without pushing: the move's deltas are gathered and summed at once
+        us = board.turn
+        n = len(moves)
+        frm = np.empty(n, dtype=np.int64)
+        to = np.empty(n, dtype=np.int64)
+        piece = np.empty(n, dtype=np.int64)
+        placed = np.empty(n, dtype=np.int64)
+        captured = np.zeros(n, dtype=np.int64)
+        captured_sq = np.zeros(n, dtype=np.int64)
+        castle = np.zeros(n, dtype=bool)
+        for i, move in enumerate(moves):
+            frm[i], to[i] = move.from_square, move.to_square
+            piece[i] = board.piece_type_at(move.from_square)
+            placed[i] = move.promotion or piece[i]
+            if board.is_en_passant(move):
+                captured[i], captured_sq[i] = chess.PAWN, move.to_square - 8 if us == chess.WHITE else move.to_square + 8
+            elif board.is_castling(move):
+                castle[i] = True
+            else:
+                captured[i], captured_sq[i] = board.piece_type_at(move.to_square) or 0, move.to_square
+
+        mine, theirs = self.table[int(us)], self.table[int(not us)]
+        scores = board.score + mine[placed, to] - mine[piece, frm] - theirs[captured, captured_sq]
+
+        # castling also moves the rook (to is the king's destination here)
+        if castle.any():
+            king_to = to[castle]
+            kingside = king_to > frm[castle]
+            rook_from = np.where(kingside, king_to + 1, king_to - 2)
+            rook_to = np.where(kingside, king_to - 1, king_to + 1)
+            scores[castle] += mine[chess.ROOK, rook_to] - mine[chess.ROOK, rook_from]
+        return scores
+
+
+def compare_throughput(positions=2000, batch_size=256, seed=0):
+    # batch vs scalar scoring of random positions; returns positions/second
+    import random
+    from logic.bitboard import BitboardPosition
+
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < positions:
+        board = chess.Board()
+        for _ in range(rng.randint(0, 60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+
+    evaluator = Evaluator()
+    batch = BatchEvaluator(evaluator)
+
+    start = time.perf_counter()
+    scalar = [evaluator.evaluate(board) for board in boards]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = []
+    for i in range(0, len(boards), batch_size):
+        scores.extend(batch.evaluate(boards[i:i + batch_size]).tolist())
+    batch_time = time.perf_counter() - start
+    assert scores == scalar
+
+    # pre-encoded input: the tensor maths alone
+    bitboards = encode(boards)
+    start = time.perf_counter()
+    assert batch.evaluate(bitboards).tolist() == scalar
+    tensor_time = time.perf_counter() - start
+
+    # every child of a node: push/pop per move against one vectorised call
+    nodes = [BitboardPosition.from_board(board, evaluator) for board in boards[:500]]
+    start = time.perf_counter()
+    children = 0
+    for node in nodes:
+        for move in node.legal_moves:
+            node.push(move)
+            node.pop()
+            children += 1
+    push_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for node in nodes:
+        batch.child_scores(node, node.generate_legal_moves())
+    child_time = time.perf_counter() - start
+
+    return {
+        'scalar': positions / scalar_time,
+        'batch': positions / batch_time,
+        'tensor': positions / tensor_time,
+        'children_push_pop': children / push_time,
+        'children_batch': children / child_time,
+    }
+
+
+if __name__ == "__main__":
+    # python -m logic.batch [positions]
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, rate in compare_throughput(positions).items():
+        print(f"{name:18} {rate:12.0f} positions/s")
\ No newline at end of file
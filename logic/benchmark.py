@@ -0,0 +1,199 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import chess
+from logic.agents import MinimaxBot
+from logic.bitboard import BitboardPosition, perft, PERFT_POSITIONS
+from logic.board import Board
+from logic.parallel import BENCH_FENS
+
+# BENCHMARK SUITE
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench_baseline.json")
+THRESHOLD = 0.10  # a rate this much below the baseline fails the run
+
+PERFT_NAMES = ['startpos', 'kiwipete', 'position3', 'position4', 'position5', 'position6']
+GENERATORS = {'python-chess': chess.Board, 'bitboard': BitboardPosition}
+
+
+def timed(function, repeat):
+    # best of repeat runs: (result, seconds)
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[1]:
+            best = (result, seconds)
+    return best
+
+
+def rate(count, seconds):
+    return count / seconds if seconds else 0.0
+
+
+# SUITES
+
+def bench_perft(max_depth, repeat=1):
+    # node counts are checked against the published numbers
+    results = {}
+    errors = []
+    for generator, make in GENERATORS.items():
+        total_nodes, total_time, positions = 0, 0.0, []
+        for name, (fen, expected) in zip(PERFT_NAMES, PERFT_POSITIONS):
+            depth = min(max_depth, len(expected))
+            nodes, seconds = timed(lambda: perft(make(fen), depth), repeat)
+            if nodes != expected[depth - 1]:
+                errors.append(f"perft {generator} {name} depth {depth}: {nodes} != {expected[depth - 1]}")
+            positions.append({'name': name, 'depth': depth, 'nodes': nodes, 'time': seconds, 'nps': rate(nodes, seconds)})
+            total_nodes += nodes
+            total_time += seconds
+        results[f"perft/{generator}"] = {'nodes': total_nodes, 'time': total_time, 'rate': rate(total_nodes, total_time),
+                                         'positions': positions}
+    return results, errors
+
+
+def search_position(fen, depth, time_limit, backend):
+    # fresh bot per position so no position reuses another's tables
+    board = Board()
+    board.engine = chess.Board(fen)
+    bot = MinimaxBot(depth, time_limit=time_limit, backend=backend)
+    bot.set_color(board.engine.turn)
+    start = time.perf_counter()
+    move = bot.get_move(board)
+    seconds = time.perf_counter() - start
+    bot.close()
+    return {'fen': fen, 'move': move, 'depth': bot.stats.depth, 'nodes': bot.nodes + bot.qnodes, 'time': seconds}
+
+
+def bench_search(depth=None, time_limit=None, backend='bitboard', repeat=1):
+    # fixed depth: same work every run, the time is what changes;
+    # fixed time: the nodes searched (and depth reached) are what changes
+    positions = []
+    for fen in BENCH_FENS:
+        runs = [search_position(fen, depth or 64, time_limit, backend) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run['time']) if depth else max(runs, key=lambda run: run['nodes'])
+        best['nps'] = rate(best['nodes'], best['time'])
+        positions.append(best)
+    nodes = sum(position['nodes'] for position in positions)
+    seconds = sum(position['time'] for position in positions)
+    name = f"search/{backend}/depth{depth}" if depth else f"search/{backend}/time{time_limit:g}"
+    return {name: {'nodes': nodes, 'time': seconds, 'rate': rate(nodes, seconds), 'positions': positions}}
+
+
+def bench_board(plies=2000, seed=0, repeat=1):
+    # the gui board: a legal move list per square and a move, like a click
+    def play():
+        rng = random.Random(seed)
+        board = Board()
+        done = 0
+        while done < plies:
+            if board.is_game_over():
+                board = Board()
+            squares = [(r, c) for r in range(8) for c in range(8)
+                       if board.get_piece_at(r, c) and board.is_piece_turn(board.get_piece_at(r, c))]
+            movable = [(sq, board.get_valid_moves(sq)) for sq in squares]
+            movable = [(sq, targets) for sq, targets in movable if targets]
+            start, targets = rng.choice(movable)
+            board.move_piece(start, rng.choice(targets))
+            done += 1
+        return done
+
+    done, seconds = timed(play, repeat)
+    return {'board/moves': {'nodes': done, 'time': seconds, 'rate': rate(done, seconds)}}
+
+
+def run_suite(perft_depth=3, search_depth=4, search_time=0.5, board_plies=2000, repeat=1):
+    results = {}
+    perft_results, errors = bench_perft(perft_depth, repeat)
+    results.update(perft_results)
+    if search_depth:
+        results.update(bench_search(depth=search_depth, repeat=repeat))
+    if search_time:
+        results.update(bench_search(time_limit=search_time, repeat=repeat))
+    if board_plies:
+        results.update(bench_board(board_plies, repeat=repeat))
+    return {
+        'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'settings': {'perft_depth': perft_depth, 'search_depth': search_depth, 'search_time': search_time,
+                     'board_plies': board_plies, 'repeat': repeat},
+        'errors': errors,
+        'results': results,
+    }
+
+
+# BASELINE
+
+def compare(report, baseline, threshold=THRESHOLD):
+    # (lines, regressions): rates are compared, higher is better; a changed
+    # fixed-depth node count means the search itself changed, which is noted
+    lines, regressions = [], []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            lines.append(f"{name:32} {result['rate']:12.0f}/s  (no baseline)")
+            continue
+        change = result['rate'] / base['rate'] - 1 if base['rate'] else 0.0
+        line = f"{name:32} {result['rate']:12.0f}/s  baseline {base['rate']:12.0f}/s  {change:+7.1%}"
+        if '/depth' in name and result['nodes'] != base['nodes']:
+            line += f"  nodes {base['nodes']} -> {result['nodes']}"
+        if change < -threshold:
+            line += "  SLOWER"
+            regressions.append(name)
+        lines.append(line)
+    return lines, regressions
+
+
+if __name__ == "__main__":
+    # python -m logic.benchmark                    run, compare with the baseline if there is one
+    # python -m logic.benchmark --save-baseline    run and make this the baseline
+    parser = argparse.ArgumentParser(description="perft, search and board benchmarks")
+    parser.add_argument("--perft-depth", type=int, default=3)
+    parser.add_argument("--search-depth", type=int, default=4, help="0 to skip")
+    parser.add_argument("--search-time", type=float, default=0.5, help="seconds per position, 0 to skip")
+    parser.add_argument("--board-plies", type=int, default=2000, help="0 to skip")
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    parser.add_argument("--out", help="write the results as json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown, 0.1 = 10%%")
+    options = parser.parse_args()
+
+    report = run_suite(options.perft_depth, options.search_depth, options.search_time, options.board_plies, options.repeat)
+    for error in report['errors']:
+        print("MISMATCH", error)
+
+    if options.out:
+        with open(options.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if options.save_baseline:
+        with open(options.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        for name, result in report['results'].items():
+            print(f"{name:32} {result['rate']:12.0f}/s")
+        print(f"baseline saved to {options.baseline}")
+    elif os.path.exists(options.baseline):
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        if baseline['settings'] != report['settings']:
+            print("warning: baseline was run with different settings", baseline['settings'])
+        lines, regressions = compare(report, baseline, options.threshold)
+        print("\n".join(lines))
+    else:
+        for name, result in report['results'].items():
+            print(f"{name:32} {result['rate']:12.0f}/s")
+        print(f"no baseline at {options.baseline}, run with --save-baseline to make one")
+
+    failed = bool(report['errors'] or regressions)
+    print("FAILED" if failed else "ok")
+    sys.exit(1 if failed else 0)
\ No newline at end of file
@@ -0,0 +1,449 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+import chess
+
+# ENDGAME BITBASES
+
+# win/draw/loss for king + pieces against a lone king, built locally by
+# retrograde analysis (python -m logic.bitbases) and memory-mapped by the search;
+# the distance planes let the root play won endings out without searching
+
+BITBASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bitbases")
+
+# strong side's pieces besides the king, in index order; generated in this
+# order because kpk promotes into krk/kqk
+TABLES = {
+    'KQK': (chess.QUEEN,),
+    'KRK': (chess.ROOK,),
+    'KPK': (chess.PAWN,),
+    'KBNK': (chess.KNIGHT, chess.BISHOP),
+}
+MATERIAL = {pieces: name for name, pieces in TABLES.items()}
+
+# file: magic, piece count, distance bits, then bit arrays over every index:
+# strong side to move wins, weak side to move loses, then the distance
+# (retrograde layer) of those wins and losses as bit planes, lowest bit first
+BITBASE_MAGIC = b'CBB2'
+HEADER = struct.Struct('<4sBB2x')
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+
+def table_size(name):
+    # index = ((strong king * 64 + weak king) * 64 + piece) * 64 + piece ...
+    return 64 ** (2 + len(TABLES[name]))
+
+
+class Bitbases:
+    def __init__(self, directory=BITBASE_DIR):
+        # tables that were not generated are simply missing
+        self.tables = {}
+        for name in TABLES:
+            path = os.path.join(directory, f"{name.lower()}.bin")
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count, planes = HEADER.unpack_from(data)
+            if magic != BITBASE_MAGIC or count != 2 + len(TABLES[name]) or len(data) != HEADER.size + table_size(name) // 4 * (1 + planes):
+                data.close()
+                raise ValueError(f"bad bitbase file: {path}")
+            self.tables[name] = (data, planes)
+
+    def __bool__(self):
+        return bool(self.tables)
+
+    def probe(self, board):
+        # WIN / DRAW / LOSS for the side to move, None if no table covers the position
+        found = self._lookup(board)
+        if found is None:
+            return None
+        data, planes, size, index, strong_to_move = found
+        offset = HEADER.size + (0 if strong_to_move else size)
+        if data[offset + (index >> 3)] >> (index & 7) & 1:
+            return WIN if strong_to_move else LOSS
+        return DRAW
+
+    def distance(self, board):
+        # plies to mate (to promotion in kpk) of a won or lost position, else None
+        found = self._lookup(board)
+        if found is None:
+            return None
+        data, planes, size, index, strong_to_move = found
+        if not data[HEADER.size + (0 if strong_to_move else size) + (index >> 3)] >> (index & 7) & 1:
+            return None
+        offset = HEADER.size + 2 * size + (0 if strong_to_move else planes * size)
+        layer = 0
+        for bit in range(planes):
+            layer |= (data[offset + bit * size + (index >> 3)] >> (index & 7) & 1) << bit
+        return 2 * layer + 1 if strong_to_move else 2 * layer
+
+    def best_move(self, board):
+        # fastest win or slowest loss straight from the tables; None when the
+        # position is drawn or not covered, so the search decides
+        result = self.probe(board)
+        if result is None or result == DRAW:
+            return None
+        # moves are tried on a copy: the board may be the one the gui draws
+        board = board.copy(stack=False)
+        best, best_key = None, None
+        for move in board.legal_moves:
+            # the board only ever promotes to a queen
+            if move.promotion not in (None, chess.QUEEN):
+                continue
+            board.push(move)
+            if board.is_checkmate():
+                key = -1
+            elif move.promotion:
+                # converted: kpk distances count plies to promotion
+                key = 0 if self.probe(board) == LOSS else None
+            else:
+                key = self.distance(board) if self.probe(board) == -result else None
+            board.pop()
+            if key is None:
+                continue
+            # the winner wants the shortest distance, the loser the longest
+            if best is None or (key < best_key if result == WIN else key > best_key):
+                best, best_key = move, key
+        return best
+
+    def _lookup(self, board):
+        if chess.popcount(board.occupied) > 4:
+            return None
+
+        # exactly one side may have pieces besides the king
+        white = board.occupied_co[chess.WHITE] & ~board.kings
+        black = board.occupied_co[chess.BLACK] & ~board.kings
+        if white and black or not (white or black):
+            return None
+        strong = chess.WHITE if white else chess.BLACK
+        pieces = white or black
+
+        types = tuple(sorted(board.piece_type_at(sq) for sq in chess.scan_forward(pieces)))
+        name = MATERIAL.get(types)
+        if name is None or name not in self.tables:
+            return None
+
+        # tables are built with the strong side as white, so mirror black's
+        flip = 0 if strong == chess.WHITE else 56
+        index = (board.king(strong) ^ flip) * 64 + (board.king(not strong) ^ flip)
+        for piece_type in TABLES[name]:
+            index = index * 64 + (chess.lsb(board.pieces_mask(piece_type, strong)) ^ flip)
+
+        data, planes = self.tables[name]
+        return data, planes, table_size(name) // 8, index, board.turn == strong
+
+    def close(self):
+        for data, _ in self.tables.values():
+            data.close()
+        self.tables = {}
+
+
+# RETROGRADE GENERATION (needs numpy)
+
+CHUNK = 1 << 20  # positions handled per vectorised step
+
+
+class _Geometry:
+    # square lookup tables as numpy arrays
+    def __init__(self, np):
+        self.bit = np.array([1 << sq for sq in chess.SQUARES], dtype=np.uint64)
+        self.between = np.zeros((64, 64), dtype=np.uint64)
+        self.rook_line = np.zeros((64, 64), dtype=bool)
+        self.bishop_line = np.zeros((64, 64), dtype=bool)
+        self.king = np.zeros((64, 64), dtype=bool)
+        self.knight = np.zeros((64, 64), dtype=bool)
+        self.pawn = np.zeros((64, 64), dtype=bool)
+        for a in chess.SQUARES:
+            for b in chess.SQUARES:
+                if a == b:
+                    continue
+                df = chess.square_file(b) - chess.square_file(a)
+                dr = chess.square_rank(b) - chess.square_rank(a)
+                self.between[a, b] = chess.between(a, b)
+                self.rook_line[a, b] = df == 0 or dr == 0
+                self.bishop_line[a, b] = abs(df) == abs(dr)
+                self.king[a, b] = max(abs(df), abs(dr)) == 1
+                self.knight[a, b] = sorted((abs(df), abs(dr))) == [1, 2]
+                self.pawn[a, b] = dr == 1 and abs(df) == 1
+
+        # rays[square, direction, distance - 1], -1 off the board
+        self.directions = {
+            chess.KING: [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)],
+            chess.KNIGHT: [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)],
+            chess.ROOK: [(1, 0), (0, 1), (-1, 0), (0, -1)],
+            chess.BISHOP: [(1, 1), (-1, 1), (-1, -1), (1, -1)],
+        }
+        self.directions[chess.QUEEN] = self.directions[chess.ROOK] + self.directions[chess.BISHOP]
+        self.rays = {}
+        for piece_type, directions in self.directions.items():
+            length = 7 if piece_type in (chess.ROOK, chess.BISHOP, chess.QUEEN) else 1
+            rays = np.full((64, len(directions), length), -1, dtype=np.int64)
+            for sq in chess.SQUARES:
+                for d, (df, dr) in enumerate(directions):
+                    f, r = chess.square_file(sq), chess.square_rank(sq)
+                    for k in range(length):
+                        f, r = f + df, r + dr
+                        if not (0 <= f < 8 and 0 <= r < 8):
+                            break
+                        rays[sq, d, k] = chess.square(f, r)
+            self.rays[piece_type] = rays
+
+    def attacks(self, piece_type, frm, to, occupied):
+        # does a white piece on frm attack to, with sliders blocked by occupied
+        if piece_type == chess.KING:
+            return self.king[frm, to]
+        if piece_type == chess.KNIGHT:
+            return self.knight[frm, to]
+        if piece_type == chess.PAWN:
+            return self.pawn[frm, to]
+        clear = (self.between[frm, to] & occupied) == 0
+        if piece_type == chess.ROOK:
+            return self.rook_line[frm, to] & clear
+        if piece_type == chess.BISHOP:
+            return self.bishop_line[frm, to] & clear
+        return (self.rook_line[frm, to] | self.bishop_line[frm, to]) & clear
+
+
+class _Generator:
+    def __init__(self, np, geometry, name, solved):
+        self.np = np
+        self.geo = geometry
+        self.name = name
+        self.types = (chess.KING, chess.KING) + TABLES[name]
+        self.n = len(self.types)
+        self.size = 64 ** self.n
+        self.weights = [64 ** (self.n - 1 - i) for i in range(self.n)]
+        self.solved = solved  # finished tables, for promotions
+
+        self.valid_wtm = np.zeros(self.size, dtype=bool)
+        self.valid_btm = np.zeros(self.size, dtype=bool)
+        self.win = np.zeros(self.size, dtype=bool)  # white to move wins
+        self.lost = np.zeros(self.size, dtype=bool)  # black to move loses
+        self.escape = np.zeros(self.size, dtype=bool)  # black can take a piece safely
+        self.moves_left = np.zeros(self.size, dtype=np.int8)  # black moves not yet proven lost
+
+        # retrograde layer each win / loss was found in: mates (and kpk
+        # promotions) are layer 0, so distances are exact
+        self.win_layer = np.zeros(self.size, dtype=np.int8)
+        self.lost_layer = np.zeros(self.size, dtype=np.int8)
+
+    def decode(self, index):
+        # index array -> [white king, black king, pieces...] square arrays
+        return [(index // w) % 64 for w in self.weights]
+
+    def occupancy(self, squares, skip=()):
+        occupied = self.np.zeros(len(squares[0]), dtype=self.np.uint64)
+        for i, sq in enumerate(squares):
+            if i not in skip:
+                occupied |= self.geo.bit[sq]
+        return occupied
+
+    def black_attacked(self, squares, target, skip=()):
+        # is target attacked by the white pieces (skip: captured ones)
+        np = self.np
+        occupied = self.occupancy(squares, skip=(1,) + tuple(skip))
+        attacked = np.zeros(len(target), dtype=bool)
+        for i, piece_type in enumerate(self.types):
+            if i == 1 or i in skip:
+                continue
+            attacked |= self.geo.attacks(piece_type, squares[i], target, occupied)
+        return attacked
+
+    def setup(self):
+        np = self.np
+        bk = 1
+        for start in range(0, self.size, CHUNK):
+            index = np.arange(start, min(start + CHUNK, self.size), dtype=np.int64)
+            squares = self.decode(index)
+
+            # distinct squares, kings apart, pawns off the back ranks
+            valid = ~self.geo.king[squares[0], squares[1]]
+            for i in range(self.n):
+                for j in range(i + 1, self.n):
+                    valid &= squares[i] != squares[j]
+                if self.types[i] == chess.PAWN:
+                    valid &= (squares[i] >= 8) & (squares[i] < 56)
+
+            in_check = self.black_attacked(squares, squares[bk])
+            self.valid_btm[index] = valid
+            self.valid_wtm[index] = valid & ~in_check
+
+        # black's legal moves need valid_wtm of the targets, so a second pass
+        mates = []
+        for start in range(0, self.size, CHUNK):
+            index = np.arange(start, min(start + CHUNK, self.size), dtype=np.int64)
+            index = index[self.valid_btm[index]]
+            squares = self.decode(index)
+            moves = np.zeros(len(index), dtype=np.int8)
+            escape = np.zeros(len(index), dtype=bool)
+
+            for target in self.geo.rays[chess.KING][squares[bk], :, 0].T:
+                on_board = target >= 0
+                safe_target = np.where(on_board, target, 0)
+                captured = np.full(len(index), -1)
+                for i in range(2, self.n):
+                    captured = np.where(on_board & (squares[i] == target), i, captured)
+
+                # quiet king moves: legal when the resulting position is
+                quiet = on_board & (captured < 0)
+                moved = index + (safe_target - squares[bk]) * self.weights[bk]
+                moves += quiet & self.valid_wtm[np.where(quiet, moved, 0)]
+
+                # a safe capture leaves bare material, which is a draw
+                for i in range(2, self.n):
+                    takes = captured == i
+                    if takes.any():
+                        escape |= takes & ~self.black_attacked(squares, safe_target, skip=(i,))
+
+            self.moves_left[index] = moves
+            self.escape[index] = escape
+            in_check = ~self.valid_wtm[index]
+            mates.append(index[in_check & (moves == 0) & ~escape])
+
+        self.lost[np.concatenate(mates)] = True
+        return np.concatenate(mates)
+
+    def promotions(self):
+        # kpk: a pawn push to the last rank wins if the new krk/kqk position does
+        np = self.np
+        wins = []
+        for start in range(0, self.size, CHUNK):
+            index = np.arange(start, min(start + CHUNK, self.size), dtype=np.int64)
+            index = index[self.valid_wtm[index]]
+            wk, bk, pawn = self.decode(index)
+            to = pawn + 8
+            push = (pawn >= 48) & (to != wk) & (to != bk)
+            won = np.zeros(len(index), dtype=bool)
+            for name in ('KQK', 'KRK'):
+                if name in self.solved:
+                    promoted = (wk * 64 + bk) * 64 + np.where(push, to, 0)
+                    won |= push & self.solved[name][np.where(push, promoted, 0)]
+            wins.append(index[won])
+        wins = np.concatenate(wins)
+        self.win[wins] = True
+        return wins
+
+    def white_unmoves(self, index):
+        # wtm predecessors of black-to-move positions
+        np = self.np
+        squares = self.decode(index)
+        occupied = self.occupancy(squares)
+        preds = []
+        for i in [0] + list(range(2, self.n)):
+            piece_type = self.types[i]
+            sq = squares[i]
+            if piece_type == chess.PAWN:
+                # single push from one rank below, double push onto the fourth rank
+                frm = sq - 8
+                single = (frm >= 8) & ((occupied & self.geo.bit[np.maximum(frm, 0)]) == 0)
+                preds.append((index - 8 * self.weights[i])[single])
+                frm = sq - 16
+                double = single & (sq >= 24) & (sq < 32) & ((occupied & self.geo.bit[np.maximum(frm, 0)]) == 0)
+                preds.append((index - 16 * self.weights[i])[double])
+                continue
+
+            rays = self.geo.rays[piece_type][sq]
+            for d in range(rays.shape[1]):
+                open_ = np.ones(len(index), dtype=bool)
+                for k in range(rays.shape[2]):
+                    frm = rays[:, d, k]
+                    open_ &= frm >= 0
+                    open_ &= (occupied & self.geo.bit[np.maximum(frm, 0)]) == 0
+                    if not open_.any():
+                        break
+                    preds.append((index + (frm - sq) * self.weights[i])[open_])
+        preds = np.concatenate(preds)
+        return preds[self.valid_wtm[preds]]
+
+    def black_unmoves(self, index):
+        # btm predecessors of white-to-move positions
+        np = self.np
+        squares = self.decode(index)
+        bk = squares[1]
+        occupied = self.occupancy(squares, skip=(1,))
+        preds = []
+        for frm in self.geo.rays[chess.KING][bk, :, 0].T:
+            ok = (frm >= 0) & ((occupied & self.geo.bit[np.maximum(frm, 0)]) == 0)
+            preds.append((index + (frm - bk) * self.weights[1])[ok])
+        preds = np.concatenate(preds)
+        return preds[self.valid_btm[preds]]
+
+    def solve(self):
+        np = self.np
+        lost_frontier = self.setup()
+        win_frontier = self.promotions() if chess.PAWN in self.types else np.zeros(0, dtype=np.int64)
+
+        # alternate until neither side's frontier grows
+        layer = 0
+        while len(lost_frontier) or len(win_frontier):
+            new_wins = []
+            for start in range(0, len(lost_frontier), CHUNK):
+                preds = np.unique(self.white_unmoves(lost_frontier[start:start + CHUNK]))
+                preds = preds[~self.win[preds]]
+                self.win[preds] = True
+                self.win_layer[preds] = layer
+                new_wins.append(preds)
+            win_frontier = np.concatenate([win_frontier] + new_wins)
+
+            new_lost = []
+            for start in range(0, len(win_frontier), CHUNK):
+                preds, counts = np.unique(self.black_unmoves(win_frontier[start:start + CHUNK]), return_counts=True)
+                self.moves_left[preds] -= counts.astype(np.int8)
+                done = preds[(self.moves_left[preds] == 0) & ~self.escape[preds] & ~self.lost[preds]]
+                self.lost[done] = True
+                self.lost_layer[done] = layer + 1
+                new_lost.append(done)
+            lost_frontier = np.concatenate(new_lost) if new_lost else np.zeros(0, dtype=np.int64)
+            win_frontier = np.zeros(0, dtype=np.int64)
+            layer += 1
+
+        return self.win, self.lost
+
+
+def generate(names=tuple(TABLES), directory=BITBASE_DIR, verbose=True):
+    import numpy as np
+
+    os.makedirs(directory, exist_ok=True)
+    geometry = _Geometry(np)
+    solved = {}
+    for name in TABLES:
+        if name not in names and not (name in ('KQK', 'KRK') and 'KPK' in names):
+            continue
+        start = time.perf_counter()
+        generator = _Generator(np, geometry, name, solved)
+        win, lost = generator.solve()
+        solved[name] = lost
+        if name not in names:
+            continue
+
+        # write then rename so a half-written table is never mapped
+        path = os.path.join(directory, f"{name.lower()}.bin")
+        layers = (generator.win_layer, generator.lost_layer)
+        planes = int(max(layer.max() for layer in layers)).bit_length()
+        with open(path + '.tmp', 'wb') as f:
+            f.write(HEADER.pack(BITBASE_MAGIC, 2 + len(TABLES[name]), planes))
+            f.write(np.packbits(win, bitorder='little').tobytes())
+            f.write(np.packbits(lost, bitorder='little').tobytes())
+            for layer in layers:
+                for bit in range(planes):
+                    f.write(np.packbits((layer >> bit) & 1, bitorder='little').tobytes())
+        os.replace(path + '.tmp', path)
+        if verbose:
+            longest = int(generator.lost_layer.max())
+            print(f"{name}: {int(win.sum())} wins, {int(lost.sum())} losses, "
+                  f"longest loss {2 * longest} plies, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    # python -m logic.bitbases [KQK KRK KPK KBNK]
+    parser = argparse.ArgumentParser(description="generate endgame bitbases by retrograde analysis")
+    parser.add_argument('tables', nargs='*', default=list(TABLES), choices=list(TABLES))
+    parser.add_argument('--dir', default=BITBASE_DIR)
+    options = parser.parse_args()
+    generate(options.tables, options.dir)
\ No newline at end of file
@@ -0,0 +1,654 @@
+import sys
+import time
+import chess
+from logic import zobrist
+from logic.evaluation import Evaluator
+from logic.position import static_exchange
+
+# BITBOARD MOVE GENERATOR
+
+# squares use python-chess numbering (a1 = 0, h8 = 63) and moves are the
+# python-chess Move objects, built once up front, so the search can use
+# this class in place of Position without converting anything
+
+BB_ALL = 0xFFFFFFFFFFFFFFFF
+BB_SQUARES = [1 << square for square in range(64)]
+BB_FILE_A = 0x0101010101010101
+BB_FILE_H = BB_FILE_A << 7
+BB_RANK_1 = 0xFF
+BB_RANK_3 = BB_RANK_1 << 16
+BB_RANK_6 = BB_RANK_1 << 40
+BB_RANK_8 = BB_RANK_1 << 56
+BB_DARK_SQUARES = 0xAA55AA55AA55AA55
+BB_LIGHT_SQUARES = ~BB_DARK_SQUARES & BB_ALL
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+WHITE, BLACK = True, False
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# castling rights as 4 bits, mapped to python-chess rook squares for hashing
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_SQUARES = {WHITE_KINGSIDE: chess.H1, WHITE_QUEENSIDE: chess.A1,
+                    BLACK_KINGSIDE: chess.H8, BLACK_QUEENSIDE: chess.A8}
+CASTLING_KEYS = [zobrist.castling_key(sum(BB_SQUARES[square] for bit, square in CASTLING_SQUARES.items() if rights & bit))
+                 for rights in range(16)]
+
+
+def _step_attacks(deltas):
+    table = []
+    for square in range(64):
+        file, rank = square & 7, square >> 3
+        mask = 0
+        for df, dr in deltas:
+            f, r = file + df, rank + dr
+            if 0 <= f < 8 and 0 <= r < 8:
+                mask |= BB_SQUARES[r * 8 + f]
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _step_attacks([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _step_attacks([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+# PAWN_ATTACKS[color][square]: squares a pawn of that color attacks
+PAWN_ATTACKS = [_step_attacks([(-1, -1), (1, -1)]), _step_attacks([(-1, 1), (1, 1)])]
+
+
+def _ray_attacks(square, occupied, directions):
+    mask = 0
+    file, rank = square & 7, square >> 3
+    for df, dr in directions:
+        f, r = file + df, rank + dr
+        while 0 <= f < 8 and 0 <= r < 8:
+            bit = BB_SQUARES[r * 8 + f]
+            mask |= bit
+            if occupied & bit:
+                break
+            f, r = f + df, r + dr
+    return mask
+
+
+def _line_tables(directions):
+    # for every square: the relevant blocker mask (edges dropped) and a
+    # dict from blockers on that mask to the attacked squares
+    masks, tables = [], []
+    for square in range(64):
+        mask = 0
+        file, rank = square & 7, square >> 3
+        for df, dr in directions:
+            f, r = file + df, rank + dr
+            while 0 <= f + df < 8 and 0 <= r + dr < 8:
+                mask |= BB_SQUARES[r * 8 + f]
+                f, r = f + df, r + dr
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = _ray_attacks(square, subset, directions)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+RANK_MASKS, RANK_ATTACKS = _line_tables([(1, 0), (-1, 0)])
+FILE_MASKS, FILE_ATTACKS = _line_tables([(0, 1), (0, -1)])
+DIAG_MASKS, DIAG_ATTACKS = _line_tables([(1, 1), (-1, -1)])
+ANTI_MASKS, ANTI_ATTACKS = _line_tables([(1, -1), (-1, 1)])
+
+
+def _line_through(a, b, strict):
+    # squares on the line through a and b (strict: only those between)
+    fa, ra, fb, rb = a & 7, a >> 3, b & 7, b >> 3
+    df, dr = fb - fa, rb - ra
+    if a == b or not (df == 0 or dr == 0 or abs(df) == abs(dr)):
+        return 0
+    df, dr = (df > 0) - (df < 0), (dr > 0) - (dr < 0)
+    if strict:
+        mask, f, r = 0, fa + df, ra + dr
+        while (f, r) != (fb, rb):
+            mask |= BB_SQUARES[r * 8 + f]
+            f, r = f + df, r + dr
+        return mask
+    return _ray_attacks(a, 0, [(df, dr), (-df, -dr)]) | BB_SQUARES[a]
+
+
+BETWEEN = [[_line_through(a, b, True) for b in range(64)] for a in range(64)]
+LINE = [[_line_through(a, b, False) for b in range(64)] for a in range(64)]
+
+# castling rights that survive a move touching each square
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[chess.E1] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[chess.H1] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASKS[chess.A1] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASKS[chess.E8] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[chess.H8] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASKS[chess.A8] = 15 & ~BLACK_QUEENSIDE
+
+# shared move objects: MOVES[from][to] and PROMOTION_MOVES[from][to][piece]
+MOVES = [[chess.Move(f, t) for t in range(64)] for f in range(64)]
+PROMOTION_MOVES = [[{piece: chess.Move(f, t, piece) for piece in PROMOTIONS} for t in range(64)] for f in range(64)]
+
+
+def rook_attacks(square, occupied):
+    return (RANK_ATTACKS[square][occupied & RANK_MASKS[square]]
+            | FILE_ATTACKS[square][occupied & FILE_MASKS[square]])
+
+
+def bishop_attacks(square, occupied):
+    return (DIAG_ATTACKS[square][occupied & DIAG_MASKS[square]]
+            | ANTI_ATTACKS[square][occupied & ANTI_MASKS[square]])
+
+
+def popcount(bb):
+    return bin(bb).count("1")
+
+
+class BitboardPosition:
+    # same surface as logic.position.Position for everything the search
+    # touches: legal move generation, push/pop, key, score and draw rules
+
+    def __init__(self, fen=chess.STARTING_FEN, evaluator=None):
+        self.evaluator = evaluator or Evaluator()
+        self.load(chess.Board(fen))
+
+    @classmethod
+    def from_board(cls, board, evaluator=None):
+        # replay the game so repetition checks still see the history
+        position = cls(board.root().fen(), evaluator)
+        for move in board.move_stack:
+            position.push(move)
+        return position
+
+    def load(self, board):
+        self.root_fen = board.fen()
+        self.bb = [0, board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings]
+        self.occupied_co = [board.occupied_co[BLACK], board.occupied_co[WHITE]]
+        self.occupied = board.occupied
+        self.squares = [0] * 64
+        for square, piece in board.piece_map().items():
+            self.squares[square] = piece.piece_type
+
+        self.turn = board.turn
+        self.castling = 0
+        for bit, square in CASTLING_SQUARES.items():
+            if board.castling_rights & BB_SQUARES[square]:
+                self.castling |= bit
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+
+        self.key = zobrist.hash_board(board)
+        self.score = self.evaluator.evaluate(board)
+        self.move_stack = []
+        self.undo_stack = []
+
+    # piece sets, named like python-chess for the shared helpers
+
+    @property
+    def pawns(self):
+        return self.bb[PAWN]
+
+    @property
+    def knights(self):
+        return self.bb[KNIGHT]
+
+    @property
+    def bishops(self):
+        return self.bb[BISHOP]
+
+    @property
+    def rooks(self):
+        return self.bb[ROOK]
+
+    @property
+    def queens(self):
+        return self.bb[QUEEN]
+
+    @property
+    def kings(self):
+        return self.bb[KING]
+
+    def pieces_mask(self, piece_type, color):
+        return self.bb[piece_type] & self.occupied_co[color]
+
+    def piece_type_at(self, square):
+        return self.squares[square] or None
+
+    def king(self, color):
+        king = self.bb[KING] & self.occupied_co[color]
+        return king.bit_length() - 1 if king else None
+
+    # attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
+        bb = self.bb
+        attackers = ((KNIGHT_ATTACKS[square] & bb[KNIGHT])
+                     | (KING_ATTACKS[square] & bb[KING])
+                     | (PAWN_ATTACKS[not color][square] & bb[PAWN])
+                     | (rook_attacks(square, occupied) & (bb[ROOK] | bb[QUEEN]))
+                     | (bishop_attacks(square, occupied) & (bb[BISHOP] | bb[QUEEN])))
+        return attackers & self.occupied_co[color]
+
+    def is_attacked_by(self, color, square):
+        return bool(self.attackers_mask(color, square))
+
+    def is_check(self):
+        king = self.king(self.turn)
+        return king is not None and self.is_attacked_by(not self.turn, king)
+
+    # move generation
+
+    def generate_pseudo_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        moves = []
+        us = self.turn
+        own = self.occupied_co[us]
+        their = self.occupied_co[not us]
+        occupied = self.occupied
+        targets = ~own & to_mask
+        bb = self.bb
+
+        # pieces
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            pieces = bb[piece_type] & own & from_mask
+            while pieces:
+                from_bb = pieces & -pieces
+                pieces ^= from_bb
+                from_sq = from_bb.bit_length() - 1
+                if piece_type == KNIGHT:
+                    attacks = KNIGHT_ATTACKS[from_sq]
+                elif piece_type == BISHOP:
+                    attacks = bishop_attacks(from_sq, occupied)
+                elif piece_type == ROOK:
+                    attacks = rook_attacks(from_sq, occupied)
+                elif piece_type == QUEEN:
+                    attacks = rook_attacks(from_sq, occupied) | bishop_attacks(from_sq, occupied)
+                else:
+                    attacks = KING_ATTACKS[from_sq]
+                attacks &= targets
+                row = MOVES[from_sq]
+                while attacks:
+                    to_bb = attacks & -attacks
+                    attacks ^= to_bb
+                    moves.append(row[to_bb.bit_length() - 1])
+
+        # castling, only when the path is clear and not attacked
+        if self.castling and from_mask & BB_SQUARES[chess.E1 if us else chess.E8] and to_mask & ~occupied:
+            self._add_castling(moves, to_mask)
+
+        # pawns
+        pawns = bb[PAWN] & own & from_mask
+        if pawns:
+            empty = ~occupied & BB_ALL
+            if us == WHITE:
+                single = (pawns << 8) & empty
+                double = ((single & BB_RANK_3) << 8) & empty
+                left = ((pawns & ~BB_FILE_A) << 7) & their
+                right = ((pawns & ~BB_FILE_H) << 9) & their
+                push, left_shift, right_shift = 8, 7, 9
+            else:
+                single = (pawns >> 8) & empty
+                double = ((single & BB_RANK_6) >> 8) & empty
+                left = ((pawns & ~BB_FILE_A) >> 9) & their
+                right = ((pawns & ~BB_FILE_H) >> 7) & their
+                push, left_shift, right_shift = -8, -9, -7
+
+            for targets_bb, shift in ((left, left_shift), (right, right_shift), (single, push), (double, 2 * push)):
+                targets_bb &= to_mask
+                while targets_bb:
+                    to_bb = targets_bb & -targets_bb
+                    targets_bb ^= to_bb
+                    to_sq = to_bb.bit_length() - 1
+                    from_sq = to_sq - shift
+                    if to_bb & (BB_RANK_1 | BB_RANK_8):
+                        promotions = PROMOTION_MOVES[from_sq][to_sq]
+                        moves.extend(promotions[piece] for piece in PROMOTIONS)
+                    else:
+                        moves.append(MOVES[from_sq][to_sq])
+
+            ep = self.ep_square
+            if ep is not None and to_mask & BB_SQUARES[ep] and not occupied & BB_SQUARES[ep]:
+                capturers = PAWN_ATTACKS[not us][ep] & pawns
+                while capturers:
+                    from_bb = capturers & -capturers
+                    capturers ^= from_bb
+                    moves.append(MOVES[from_bb.bit_length() - 1][ep])
+        return moves
+
+    def _add_castling(self, moves, to_mask):
+        us = self.turn
+        occupied = self.occupied
+        rooks = self.bb[ROOK] & self.occupied_co[us]
+        if us == WHITE:
+            king, sides = chess.E1, ((WHITE_KINGSIDE, chess.H1, chess.G1, (chess.F1, chess.G1), (chess.F1, chess.G1)),
+                                     (WHITE_QUEENSIDE, chess.A1, chess.C1, (chess.B1, chess.C1, chess.D1), (chess.D1, chess.C1)))
+        else:
+            king, sides = chess.E8, ((BLACK_KINGSIDE, chess.H8, chess.G8, (chess.F8, chess.G8), (chess.F8, chess.G8)),
+                                     (BLACK_QUEENSIDE, chess.A8, chess.C8, (chess.B8, chess.C8, chess.D8), (chess.D8, chess.C8)))
+        if not self.bb[KING] & self.occupied_co[us] & BB_SQUARES[king]:
+            return
+        them = not us
+        in_check = None
+        for bit, rook, target, between, path in sides:
+            if not self.castling & bit or not rooks & BB_SQUARES[rook] or not to_mask & BB_SQUARES[target]:
+                continue
+            if any(occupied & BB_SQUARES[square] for square in between):
+                continue
+            if in_check is None:
+                in_check = self.is_attacked_by(them, king)
+            if in_check or any(self.is_attacked_by(them, square) for square in path):
+                continue
+            moves.append(MOVES[king][target])
+
+    def is_castling(self, move):
+        return self.squares[move.from_square] == KING and abs(move.to_square - move.from_square) == 2
+
+    def is_en_passant(self, move):
+        return (move.to_square == self.ep_square
+                and self.squares[move.from_square] == PAWN
+                and not self.squares[move.to_square]
+                and (move.to_square - move.from_square) & 7 != 0)
+
+    def is_capture(self, move):
+        return bool(self.squares[move.to_square]) or self.is_en_passant(move)
+
+    def _pins(self, king):
+        # our pieces that are the only blocker between the king and an
+        # enemy slider
+        bb = self.bb
+        their = self.occupied_co[not self.turn]
+        own = self.occupied_co[self.turn]
+        snipers = ((rook_attacks(king, 0) & (bb[ROOK] | bb[QUEEN]))
+                   | (bishop_attacks(king, 0) & (bb[BISHOP] | bb[QUEEN]))) & their
+        pinned = 0
+        while snipers:
+            sniper = snipers & -snipers
+            snipers ^= sniper
+            blockers = BETWEEN[king][sniper.bit_length() - 1] & self.occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+        return pinned
+
+    def _is_safe(self, move, king, checkers, pinned):
+        # legality check for a pseudo-legal move: our king must not be
+        # attacked afterwards
+        from_sq, to_sq = move.from_square, move.to_square
+        piece_type = self.squares[from_sq]
+        them = not self.turn
+        
+        if piece_type == KING:
+            if abs(to_sq - from_sq) == 2:
+                return True  # castling was checked while generating
+            occupied = self.occupied ^ BB_SQUARES[from_sq]
+            return not self.attackers_mask(them, to_sq, occupied) & ~BB_SQUARES[to_sq]
+        
+        if piece_type == PAWN and to_sq == self.ep_square and (to_sq - from_sq) & 7:
+            # en passant removes two pieces from the capture rank, so
+            # look at the resulting board directly
+            captured = BB_SQUARES[to_sq - 8 if self.turn == WHITE else to_sq + 8]
+            occupied = (self.occupied ^ BB_SQUARES[from_sq] ^ captured) | BB_SQUARES[to_sq]
+            return not self.attackers_mask(them, king, occupied) & ~captured
+        
+        if checkers:
+            # double check leaves only king moves, a single check must be
+            # captured or blocked
+            if checkers & (checkers - 1):
+                return False
+            if not BB_SQUARES[to_sq] & (BETWEEN[king][checkers.bit_length() - 1] | checkers):
+                return False
+        
+        # a pinned piece may only move along the pin
+        return not pinned & BB_SQUARES[from_sq] or bool(LINE[king][from_sq] & BB_SQUARES[to_sq])
+
+    def generate_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        king = self.king(self.turn)
+        checkers = self.attackers_mask(not self.turn, king)
+        pinned = self._pins(king)
+        return [move for move in self.generate_pseudo_legal_moves(from_mask, to_mask)
+                if self._is_safe(move, king, checkers, pinned)]
+
+    def has_legal_moves(self):
+        # stops at the first legal move
+        king = self.king(self.turn)
+        checkers = self.attackers_mask(not self.turn, king)
+        pinned = self._pins(king)
+        for move in self.generate_pseudo_legal_moves():
+            if self._is_safe(move, king, checkers, pinned):
+                return True
+        return False
+
+    @property
+    def legal_moves(self):
+        return self.generate_legal_moves()
+
+    def generate_legal_captures(self):
+        moves = self.generate_legal_moves(BB_ALL, self.occupied_co[not self.turn])
+        if self.ep_square is not None:
+            # only a pawn can land on the en passant square
+            moves.extend(self.generate_legal_moves(self.bb[PAWN], BB_SQUARES[self.ep_square]))
+        return moves
+
+    def tactical_moves(self):
+        # captures, plus promotions to an empty square
+        moves = self.generate_legal_captures()
+        seventh = (BB_RANK_8 >> 8) if self.turn == WHITE else (BB_RANK_1 << 8)
+        promoting = self.bb[PAWN] & self.occupied_co[self.turn] & seventh
+        if promoting:
+            moves.extend(self.generate_legal_moves(promoting, ~self.occupied & BB_ALL))
+        return moves
+
+    # make / unmake
+
+    def _set(self, square, piece_type, color):
+        bit = BB_SQUARES[square]
+        self.bb[piece_type] |= bit
+        self.occupied_co[color] |= bit
+        self.occupied |= bit
+        self.squares[square] = piece_type
+
+    def _clear(self, square, piece_type, color):
+        bit = BB_SQUARES[square]
+        self.bb[piece_type] ^= bit
+        self.occupied_co[color] ^= bit
+        self.occupied ^= bit
+        self.squares[square] = 0
+
+    def push(self, move):
+        us = self.turn
+        them = not us
+        from_sq, to_sq = move.from_square, move.to_square
+        piece_type = self.squares[from_sq]
+        captured = self.squares[to_sq]
+        captured_sq = to_sq
+        keys = zobrist.PIECE_KEYS
+        values = self.evaluator.table
+
+        if piece_type == PAWN and to_sq == self.ep_square and not captured and (to_sq - from_sq) & 7:
+            captured_sq = to_sq - 8 if us == WHITE else to_sq + 8
+            captured = PAWN
+
+        self.undo_stack.append((move, piece_type, captured, captured_sq, self.castling, self.ep_square,
+                                self.halfmove_clock, self.key, self.score))
+        key = self.key ^ zobrist.TURN_KEY ^ CASTLING_KEYS[self.castling] ^ zobrist.ep_key(self.ep_square)
+        score = self.score
+        self.halfmove_clock += 1
+        if piece_type == PAWN:
+            self.halfmove_clock = 0
+
+        if captured:
+            self._clear(captured_sq, captured, them)
+            key ^= keys[them][captured][captured_sq]
+            score -= values[them][captured][captured_sq]
+            self.halfmove_clock = 0
+
+        placed = move.promotion or piece_type
+        self._clear(from_sq, piece_type, us)
+        self._set(to_sq, placed, us)
+        key ^= keys[us][piece_type][from_sq] ^ keys[us][placed][to_sq]
+        score += values[us][placed][to_sq] - values[us][piece_type][from_sq]
+
+        if piece_type == KING and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            self._clear(rook_from, ROOK, us)
+            self._set(rook_to, ROOK, us)
+            key ^= keys[us][ROOK][rook_from] ^ keys[us][ROOK][rook_to]
+            score += values[us][ROOK][rook_to] - values[us][ROOK][rook_from]
+
+        self.ep_square = (from_sq + to_sq) // 2 if piece_type == PAWN and abs(to_sq - from_sq) == 16 else None
+        self.castling &= CASTLING_MASKS[from_sq] & CASTLING_MASKS[to_sq]
+        key ^= CASTLING_KEYS[self.castling] ^ zobrist.ep_key(self.ep_square)
+
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.turn = them
+        self.key = key
+        self.score = score
+        self.move_stack.append(move)
+
+    def pop(self):
+        (move, piece_type, captured, captured_sq, self.castling, self.ep_square,
+         self.halfmove_clock, self.key, self.score) = self.undo_stack.pop()
+        self.move_stack.pop()
+        self.turn = us = not self.turn
+        if us == BLACK:
+            self.fullmove_number -= 1
+
+        from_sq, to_sq = move.from_square, move.to_square
+        if piece_type == KING and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            self._clear(rook_to, ROOK, us)
+            self._set(rook_from, ROOK, us)
+
+        self._clear(to_sq, move.promotion or piece_type, us)
+        self._set(from_sq, piece_type, us)
+        if captured:
+            self._set(captured_sq, captured, not us)
+        return move
+
+    # draw rules
+
+    def has_insufficient_material(self, color):
+        # same rules as python-chess
+        own = self.occupied_co[color]
+        if own & (self.pawns | self.rooks | self.queens):
+            return False
+        if own & self.knights:
+            return popcount(own) <= 2 and not (self.occupied_co[not color] & ~self.kings & ~self.queens)
+        if own & self.bishops:
+            same_color = (not self.bishops & BB_DARK_SQUARES) or (not self.bishops & BB_LIGHT_SQUARES)
+            return same_color and not self.pawns and not self.knights
+        return True
+
+    def is_insufficient_material(self):
+        return self.has_insufficient_material(WHITE) and self.has_insufficient_material(BLACK)
+
+    def is_repetition(self, count=3):
+        # earlier keys with the same side to move, back to the last
+        # capture or pawn move
+        seen = 1
+        stack = self.undo_stack
+        for i in range(len(stack) - 2, max(len(stack) - 1 - self.halfmove_clock, 0) - 1, -2):
+            if stack[i][7] == self.key:
+                seen += 1
+                if seen >= count:
+                    return True
+        return False
+
+    def is_automatic_draw(self):
+        if not (self.pawns | self.rooks | self.queens) and self.is_insufficient_material():
+            return True
+        if self.halfmove_clock >= 150:
+            return True
+        return self.halfmove_clock >= 16 and self.is_repetition(5)
+
+    def see(self, move):
+        return static_exchange(self, move)
+
+    def to_board(self):
+        # python-chess copy of the game, mostly for checking against it
+        board = chess.Board(self.root_fen)
+        for move in self.move_stack:
+            board.push(move)
+        return board
+
+
+# PERFT
+
+def perft(board, depth):
+    # works on a python-chess board or a BitboardPosition
+    if depth == 0:
+        return 1
+    moves = list(board.legal_moves)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+# (fen, [node counts for depth 1, 2, ...])
+PERFT_POSITIONS = [
+    (chess.STARTING_FEN, [20, 400, 8902, 197281]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890]),
+]
+
+
+def compare_perft(max_depth=3):
+    # counts must match the published numbers (and so python-chess);
+    # prints nodes/sec for both generators
+    ok = True
+    totals = {'python-chess': [0, 0.0], 'bitboard': [0, 0.0]}
+    for fen, expected in PERFT_POSITIONS:
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            for name, board in (('python-chess', chess.Board(fen)), ('bitboard', BitboardPosition(fen))):
+                start = time.perf_counter()
+                nodes = perft(board, depth)
+                totals[name][0] += nodes
+                totals[name][1] += time.perf_counter() - start
+                if nodes != expected[depth - 1]:
+                    ok = False
+                    print(f"MISMATCH {name} depth {depth}: {nodes} != {expected[depth - 1]} ({fen})")
+    for name, (nodes, seconds) in totals.items():
+        print(f"perft {name:<13} {nodes:>9} nodes {seconds:7.2f}s {nodes / seconds:10.0f} nodes/s")
+    return ok
+
+
+def compare_search(depth=4):
+    # the same MinimaxBot search on both backends
+    from logic.agents import MinimaxBot
+    from logic.board import Board
+    from logic.parallel import BENCH_FENS
+
+    for backend in ('python-chess', 'bitboard'):
+        nodes, seconds, moves = 0, 0.0, []
+        for fen in BENCH_FENS:
+            board = Board()
+            board.engine = chess.Board(fen)
+            bot = MinimaxBot(depth, backend=backend)
+            bot.set_color(board.engine.turn)
+            start = time.perf_counter()
+            moves.append(bot.get_move(board))
+            seconds += time.perf_counter() - start
+            nodes += bot.nodes + bot.qnodes
+        print(f"search {backend:<12} {nodes:>9} nodes {seconds:7.2f}s {nodes / seconds:10.0f} nodes/s")
+        yield moves
+
+
+if __name__ == "__main__":
+    # python -m logic.bitboard [perft depth] [search depth]
+    perft_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    search_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    passed = compare_perft(perft_depth)
+    reference, bitboard = compare_search(search_depth)
+    print("perft", "ok" if passed else "FAILED")
+    print("search moves", "match" if reference == bitboard else "DIFFER")
+    sys.exit(0 if passed else 1)
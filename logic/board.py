@@ -2,54 +2,83 @@ import chess
 
 # BOARD LOGIC
 
+def to_coords(square):
+    # chess square index -> (row, col), row 0 is rank 8
+    return (7 - chess.square_rank(square), chess.square_file(square))
+
+
+class Snapshot:
+    # everything the gui asks about one position, built with a single move generation
+    def __init__(self, engine):
+        self.engine = engine
+        self.ply = len(engine.move_stack)
+        
+        # 8x8 grid of piece symbols
+        self.grid = [[None] * 8 for _ in range(8)]
+        for square, piece in engine.piece_map().items():
+            r, c = to_coords(square)
+            self.grid[r][c] = piece.symbol()
+        
+        # source -> {destination: move}, first match wins so promotions default to queen
+        self.moves = {}
+        for move in engine.legal_moves:
+            targets = self.moves.setdefault(to_coords(move.from_square), {})
+            targets.setdefault(to_coords(move.to_square), move)
+        
+        king_sq = engine.king(engine.turn)
+        self.king_pos = to_coords(king_sq) if king_sq is not None else None
+        self.in_check = engine.is_check()
+        self.is_checkmate = self.in_check and not self.moves
+        self.is_game_over = (not self.moves or engine.is_insufficient_material()
+                             or engine.is_seventyfive_moves() or engine.is_fivefold_repetition())
+
+    def is_valid(self, engine):
+        # stale if the engine was swapped or pushed to directly
+        return engine is self.engine and len(engine.move_stack) == self.ply
+
+
 class Board:
     def __init__(self):
         self.engine = chess.Board()
         self.last_move = None
+        self.snapshot = None
+
+    @property
+    def state(self):
+        # built lazily, once per position
+        if self.snapshot is None or not self.snapshot.is_valid(self.engine):
+            self.snapshot = Snapshot(self.engine)
+        return self.snapshot
 
     def get_piece_at(self, row, col):
-        # convert (row, col) to chess square index
         # row 0 is rank 8, row 7 is rank 1
-        square = chess.square(col, 7 - row)
-        piece = self.engine.piece_at(square)
-        return piece.symbol() if piece else None
+        return self.state.grid[row][col]
 
     def get_valid_moves(self, start_pos):
-        r, c = start_pos
-        start_sq = chess.square(c, 7 - r)
-        
-        moves = []
-        # get all legal moves for this square
-        for move in self.engine.legal_moves:
-            if move.from_square == start_sq:
-                # convert target square back to (row, col)
-                tr = 7 - chess.square_rank(move.to_square)
-                tc = chess.square_file(move.to_square)
-                moves.append((tr, tc))
-        return moves
+        # destinations as (row, col)
+        return list(self.state.moves.get(tuple(start_pos), ()))
 
     def move_piece(self, start, end):
-        sr, sc = start
-        er, ec = end
-        
-        start_sq = chess.square(sc, 7 - sr)
-        end_sq = chess.square(ec, 7 - er)
-        
         # find the matching move object (handling promotion automatically to queen for simplicity)
-        move_to_make = None
-        for move in self.engine.legal_moves:
-            if move.from_square == start_sq and move.to_square == end_sq:
-                move_to_make = move
-                break
+        move_to_make = self.state.moves.get(tuple(start), {}).get(tuple(end))
         
         if move_to_make:
             is_capture = self.engine.is_capture(move_to_make)
             self.engine.push(move_to_make)
             self.last_move = (start, end)
+            self.snapshot = None
             return is_capture
             
         return False
 
+    def push(self, move):
+        # an exact python-chess move (any promotion piece); returns True for a capture
+        is_capture = self.engine.is_capture(move)
+        self.engine.push(move)
+        self.last_move = (to_coords(move.from_square), to_coords(move.to_square))
+        self.snapshot = None
+        return is_capture
+
     def is_piece_turn(self, piece_symbol):
         # checks if a specific piece belongs to the active player
         if not piece_symbol: return False
@@ -62,17 +91,14 @@ class Board:
         return self.engine.turn
 
     def is_game_over(self):
-        return self.engine.is_game_over()
+        return self.state.is_game_over
 
     def is_in_check(self):
-        return self.engine.is_check()
+        return self.state.in_check
 
     def is_checkmate(self):
-        return self.engine.is_checkmate()
+        return self.state.is_checkmate
 
     def get_king_pos(self):
-        # find king of current turn
-        king_sq = self.engine.king(self.engine.turn)
-        if king_sq is not None:
-            return (7 - chess.square_rank(king_sq), chess.square_file(king_sq))
-        return None
\ No newline at end of file
+        # king of current turn
+        return self.state.king_pos
\ No newline at end of file
@@ -0,0 +1,157 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import chess
+import chess.pgn
+from logic.transposition import encode_move, decode_move
+from logic.zobrist import hash_board
+
+# OPENING BOOK
+
+# file: magic, record count, then records sorted by key (ties by weight, heaviest first)
+BOOK_MAGIC = b'CBK1'
+HEADER = struct.Struct('<4sI')
+RECORD = struct.Struct('<QHH')  # zobrist key, encoded move, weight
+
+BOOK_PLIES = 20  # only the first moves of each game go in the book
+MAX_WEIGHT = 0xFFFF
+
+
+def build_book(pgn_paths, out_path, plies=BOOK_PLIES, min_weight=1):
+    # weight per (position, move): 2 for a win by the side that played it, 1 for a draw
+    weights = {}
+    games = 0
+    for pgn_path in pgn_paths:
+        with open(pgn_path, encoding='utf-8', errors='replace') as f:
+            while True:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    break
+                result = game.headers.get('Result', '*')
+                if result == '*':
+                    continue
+                games += 1
+
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= plies:
+                        break
+                    if result == '1/2-1/2':
+                        score = 1
+                    elif (result == '1-0') == (board.turn == chess.WHITE):
+                        score = 2
+                    else:
+                        score = 0
+                    if score:
+                        entry = (hash_board(board), encode_move(move))
+                        weights[entry] = weights.get(entry, 0) + score
+                    board.push(move)
+
+    # scale down so the heaviest move fits in 16 bits
+    top = max(weights.values(), default=0)
+    scale = top / MAX_WEIGHT if top > MAX_WEIGHT else 1
+    records = []
+    for (key, code), weight in weights.items():
+        weight = int(weight / scale)
+        if weight >= min_weight:
+            records.append((key, -weight, code))
+    records.sort()
+
+    # write then rename so readers never map a half-written book
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(BOOK_MAGIC, len(records)))
+        for key, weight, code in records:
+            f.write(RECORD.pack(key, code, -weight))
+    os.replace(tmp_path, out_path)
+    return games, len(records)
+
+
+class OpeningBook:
+    def __init__(self, path):
+        # mapped read-only, so every process using the book shares the page cache
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data)
+        if magic != BOOK_MAGIC or len(self.data) != HEADER.size + self.count * RECORD.size:
+            self.data.close()
+            raise ValueError(f"not an opening book: {path}")
+
+    def _key_at(self, i):
+        return struct.unpack_from('<Q', self.data, HEADER.size + i * RECORD.size)[0]
+
+    def _lower_bound(self, key):
+        # first record with a key >= key
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def probe(self, board):
+        # [(move, weight)] for this position, heaviest first; illegal moves
+        # (a key collision) are skipped
+        key = hash_board(board)
+        entries = []
+        legal = None
+        i = self._lower_bound(key)
+        while i < self.count:
+            record_key, code, weight = RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)
+            if record_key != key:
+                break
+            if legal is None:
+                legal = set(board.legal_moves)
+            move = decode_move(code)
+            if move in legal:
+                entries.append((move, weight))
+            i += 1
+        return entries
+
+    def choose(self, board, rng=random):
+        # weighted random book move, or None when out of book
+        entries = self.probe(board)
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return rng.choices(moves, weights=weights)[0]
+
+    def close(self):
+        self.data.close()
+
+    def __len__(self):
+        return self.count
+
+
+if __name__ == "__main__":
+    # python -m logic.book build games.pgn -o book.bin
+    # python -m logic.book probe book.bin "<fen>"
+    parser = argparse.ArgumentParser(description="opening book builder and probe")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build')
+    build.add_argument('pgn', nargs='+')
+    build.add_argument('-o', '--out', default='book.bin')
+    build.add_argument('--plies', type=int, default=BOOK_PLIES)
+    build.add_argument('--min-weight', type=int, default=1)
+    probe = commands.add_parser('probe')
+    probe.add_argument('book')
+    probe.add_argument('fen', nargs='?', default=chess.STARTING_FEN)
+    options = parser.parse_args()
+
+    if options.command == 'build':
+        games, records = build_book(options.pgn, options.out, options.plies, options.min_weight)
+        print(f"{games} games -> {records} records in {options.out}")
+    else:
+        book = OpeningBook(options.book)
+        board = chess.Board(options.fen)
+        entries = book.probe(board)
+        total = sum(weight for _, weight in entries)
+        for move, weight in entries:
+            print(f"{board.san(move):8} {weight:6} {100 * weight / total:5.1f}%")
+        if not entries:
+            print("out of book")
\ No newline at end of file
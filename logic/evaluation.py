@@ -0,0 +1,104 @@
+import chess
+
+# EVALUATION
+
+MATE_SCORE = 9999
+BITBASE_WIN = 5000  # proven win short of mate: above any material score
+
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0
+}
+
+# piece-square tables in centipawns, written from white's side with a8 first
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20],
+    chess.ROOK: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0],
+    chess.QUEEN: [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20],
+}
+
+class Evaluator:
+    def __init__(self, use_pst=True, piece_values=PIECE_VALUES):
+        # material is in pawns without the tables (the original scale)
+        # and in centipawns with them, so the tables have room to matter
+        self.use_pst = use_pst
+        self.piece_values = piece_values
+        self.unit = unit = 100 if use_pst else 1
+        
+        # plain material per piece type, for exchange and pruning margins;
+        # the king is priced so that no exchange ever gives it up
+        self.material = {piece_type: value * unit for piece_type, value in piece_values.items()}
+        self.material[chess.KING] = 100 * unit
+        
+        # table[color][piece_type][square]: signed, white is positive
+        self.table = [[[0] * 64 for _ in range(7)] for _ in chess.COLORS]
+        for piece_type, value in piece_values.items():
+            pst = PIECE_SQUARE_TABLES[piece_type]
+            for square in chess.SQUARES:
+                rank, file = chess.square_rank(square), chess.square_file(square)
+                white = value * unit + (pst[(7 - rank) * 8 + file] if use_pst else 0)
+                black = value * unit + (pst[rank * 8 + file] if use_pst else 0)
+                self.table[chess.WHITE][piece_type][square] = white
+                self.table[chess.BLACK][piece_type][square] = -black
+
+    def evaluate(self, board):
+        # full scan, only used to seed the incremental score
+        score = 0
+        for square, piece in board.piece_map().items():
+            score += self.table[piece.color][piece.piece_type][square]
+        return score
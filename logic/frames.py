@@ -0,0 +1,136 @@
+import cProfile
+import csv
+import io
+import json
+import pstats
+import time
+from collections import deque
+
+# FRAME PROFILER
+
+# phases of one main loop pass, in order: input handling, clocks/resize/agent
+# start, then the draw steps. 'tick' is the fps limiter sleeping, not work
+PHASES = ('events', 'update', 'states', 'board', 'hints', 'pieces', 'overlays', 'display')
+IDLE_PHASES = ('tick',)
+HISTOGRAM_MS = (1, 2, 4, 8, 16, 33, 50, 100, 250)  # bucket upper edges, one more bucket above
+
+
+def percentile(values, p):
+    # values sorted
+    if not values:
+        return 0.0
+    return values[min(int(p * len(values)), len(values) - 1)]
+
+
+class FrameProfiler:
+    def __init__(self, fps, window=600):
+        # a frame is one pass of the main loop between two waits for events;
+        # one over the fps budget is counted as dropped
+        self.budget = 1.0 / fps
+        self.frames = deque(maxlen=window)  # the last frames, seconds per phase
+        self.count = 0
+        self.dropped = 0
+        self.profile = None
+        self.profile_until = 0.0
+        self.profile_path = None
+        self.start_frame()
+
+    def start_frame(self):
+        self.current = dict.fromkeys(PHASES + IDLE_PHASES, 0.0)
+        self.last = time.perf_counter()
+        self.cpu_start = time.thread_time()
+
+    def mark(self, phase):
+        # the time since the last mark goes to phase
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        frame = self.current
+        frame['total'] = sum(frame[phase] for phase in PHASES)
+        # wall time the loop was working but not on the cpu: mostly waiting for
+        # the gil while an agent thread searches
+        frame['stall'] = max(frame['total'] - (time.thread_time() - self.cpu_start), 0.0)
+        self.frames.append(frame)
+        self.count += 1
+        if frame['total'] > self.budget:
+            self.dropped += 1
+        if self.profile and time.perf_counter() >= self.profile_until:
+            self.stop_capture()
+
+    # SUMMARY
+
+    def histogram(self):
+        # frame counts of the window per bucket
+        counts = [0] * (len(HISTOGRAM_MS) + 1)
+        for frame in self.frames:
+            ms = frame['total'] * 1000
+            counts[next((i for i, edge in enumerate(HISTOGRAM_MS) if ms <= edge), len(HISTOGRAM_MS))] += 1
+        labels = [f"<={edge}ms" for edge in HISTOGRAM_MS] + [f">{HISTOGRAM_MS[-1]}ms"]
+        return dict(zip(labels, counts))
+
+    def summary(self):
+        # milliseconds; percentiles over the window, counts since the start
+        totals = sorted(frame['total'] for frame in self.frames)
+        stalls = sorted(frame['stall'] for frame in self.frames)
+        phases = {}
+        for phase in PHASES + IDLE_PHASES:
+            values = sorted(frame[phase] for frame in self.frames)
+            phases[phase] = {
+                'mean_ms': round(1000 * sum(values) / len(values), 3) if values else 0.0,
+                'p95_ms': round(1000 * percentile(values, 0.95), 3),
+            }
+        return {
+            'frames': self.count,
+            'dropped': self.dropped,
+            'window': len(totals),
+            'window_dropped': sum(1 for total in totals if total > self.budget),
+            'budget_ms': round(1000 * self.budget, 2),
+            'p50_ms': round(1000 * percentile(totals, 0.5), 3),
+            'p95_ms': round(1000 * percentile(totals, 0.95), 3),
+            'p99_ms': round(1000 * percentile(totals, 0.99), 3),
+            'max_ms': round(1000 * totals[-1], 3) if totals else 0.0,
+            'stall_p95_ms': round(1000 * percentile(stalls, 0.95), 3),
+            'phases': phases,
+            'histogram': self.histogram(),
+        }
+
+    def dump(self, path):
+        # .csv: one row per frame of the window; otherwise json, summary and frames
+        columns = PHASES + IDLE_PHASES + ('total', 'stall')
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(('frame',) + tuple(f"{column}_ms" for column in columns))
+                first = self.count - len(self.frames)
+                for i, frame in enumerate(self.frames):
+                    writer.writerow([first + i] + [round(1000 * frame[column], 3) for column in columns])
+        else:
+            frames = [{column: round(1000 * frame[column], 3) for column in columns} for frame in self.frames]
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(), 'frames_ms': frames}, f, indent=1)
+
+    # CPROFILE
+
+    def start_capture(self, seconds, path):
+        # profiles the main loop's thread only, agent threads aren't seen
+        if self.profile: return
+        self.profile = cProfile.Profile()
+        self.profile_until = time.perf_counter() + seconds
+        self.profile_path = path
+        self.profile.enable()
+
+    def capture_remaining(self):
+        return max(self.profile_until - time.perf_counter(), 0.0) if self.profile else None
+
+    def stop_capture(self, top=15):
+        # writes the .prof file and prints the slowest functions
+        if not self.profile: return
+        self.profile.disable()
+        self.profile.dump_stats(self.profile_path)
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(top)
+        print(f"profile saved to {self.profile_path}")
+        print(out.getvalue())
+        self.profile = None
\ No newline at end of file
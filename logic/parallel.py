@@ -0,0 +1,199 @@
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import chess
+
+# PARALLEL ROOT SEARCH
+
+# each worker process keeps one bot, so its transposition table lives
+# across moves just like in the single-process search
+_worker_bot = None
+
+# seconds between checks of the parent's stop conditions while workers search
+POLL_INTERVAL = 0.05
+
+
+def _init_worker(bot_class, options, stop_event):
+    # the stop event is shared with the parent, which sets it to cut the
+    # workers' search short (cancel, or a deadline set after they started)
+    from logic.agents import CancelToken
+    
+    global _worker_bot
+    _worker_bot = bot_class(**options)
+    _worker_bot.token = CancelToken(stop_event)
+
+
+def _search_moves(root_fen, history, ucis, depth, best_value, best_index, deadline):
+    # rebuild the position, then search a slice of the root moves;
+    # returns (uci, value, finished, counters)
+    from logic.agents import SearchTimeout
+    
+    bot = _worker_bot
+    engine = chess.Board(root_fen)
+    for uci in history:
+        engine.push_uci(uci)
+    board = bot.make_position(engine)
+    
+    index = {move: i for i, move in enumerate(engine.legal_moves)}
+    moves = [chess.Move.from_uci(uci) for uci in ucis]
+    
+    bot.new_search(depth)
+    bot.deadline = deadline
+    tt_probes, tt_hits = bot.tt.probes, bot.tt.hits
+    bot.root_best = (None, best_value)
+    try:
+        move, value = bot.search_root(board, moves, depth, index, best_value, best_index)
+        finished = True
+    except SearchTimeout:
+        move, value = bot.root_best
+        finished = False
+    counters = (bot.nodes, bot.qnodes, bot.cutoffs, bot.first_cutoffs, bot.tt_cutoffs,
+                bot.tt.probes - tt_probes, bot.tt.hits - tt_hits)
+    return (move.uci() if move else None, value, finished, counters)
+
+
+def _get_pool(bot):
+    if bot.pool is None:
+        # spawn, not fork: the parent may be running pygame and other threads
+        context = multiprocessing.get_context("spawn")
+        bot.pool_stop = context.Event()
+        bot.pool = ProcessPoolExecutor(
+            max_workers=bot.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(type(bot), bot.search_options(), bot.pool_stop))
+    return bot.pool
+
+
+def shutdown(bot):
+    if bot.pool is not None:
+        bot.pool.shutdown(cancel_futures=True)
+        bot.pool = None
+
+
+def search_root(bot, board, ordered, depth, index):
+    # the first (best ordered) move is searched here to get a bound, the
+    # rest are dealt round-robin to the workers; results are combined with
+    # the same tie rule as the serial search, so the chosen move matches it
+    best_move, best_value = bot.search_root(board, ordered[:1], depth, index)
+    rest = ordered[1:]
+    if not rest:
+        return best_move, best_value
+
+    pool = _get_pool(bot)
+    root_fen = board.root_fen
+    history = [move.uci() for move in board.move_stack]
+    best_index = index[best_move]
+    bot.pool_stop.clear()
+    
+    futures = []
+    for w in range(bot.workers):
+        chunk = [move.uci() for move in rest[w::bot.workers]]
+        if chunk:
+            futures.append(pool.submit(_search_moves, root_fen, history, chunk, depth,
+                                       best_value, best_index, bot.deadline))
+
+    # wait for the workers, passing on a cancel or an expired deadline
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, timeout=POLL_INTERVAL)
+        if bot.should_stop():
+            bot.pool_stop.set()
+    
+    finished = True
+    for future in futures:
+        uci, value, done, counters = future.result()
+        finished = finished and done
+        
+        # worker work counts towards this search's stats
+        bot.nodes += counters[0]
+        bot.qnodes += counters[1]
+        bot.cutoffs += counters[2]
+        bot.first_cutoffs += counters[3]
+        bot.tt_cutoffs += counters[4]
+        bot.worker_tt_probes += counters[5]
+        bot.worker_tt_hits += counters[6]
+        if uci is None:
+            continue
+        move = chess.Move.from_uci(uci)
+        if value > best_value or (value == best_value and index[move] < index[best_move]):
+            best_move, best_value = move, value
+            bot.root_best = (move, value)
+    
+    if not finished:
+        from logic.agents import SearchTimeout
+        raise SearchTimeout()
+    return best_move, best_value
+
+
+# SPEEDUP REPORT
+
+BENCH_FENS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1",
+]
+
+
+def compare_speedup(workers, depth, fens=BENCH_FENS):
+    from logic.agents import MinimaxBot
+    from logic.board import Board
+
+    serial_time = 0.0
+    parallel_time = 0.0
+    agree = 0
+    
+    parallel_bot = MinimaxBot(depth, workers=workers)
+    # warm up the pool so process start-up is not timed
+    _get_pool(parallel_bot).submit(int).result()
+    
+    for fen in fens:
+        board = Board()
+        board.engine = chess.Board(fen)
+        
+        serial_bot = MinimaxBot(depth)
+        serial_bot.set_color(board.engine.turn)
+        start = time.perf_counter()
+        serial_move = serial_bot.get_move(board)
+        serial_time += time.perf_counter() - start
+        
+        # fresh tables each position so neither side reuses earlier work
+        parallel_bot.tt.clear()
+        parallel_bot.set_color(board.engine.turn)
+        shutdown(parallel_bot)
+        _get_pool(parallel_bot).submit(int).result()
+        start = time.perf_counter()
+        parallel_move = parallel_bot.get_move(board)
+        parallel_time += time.perf_counter() - start
+        
+        agree += serial_move == parallel_move
+    
+    parallel_bot.close()
+    return {
+        'positions': len(fens),
+        'workers': workers,
+        'depth': depth,
+        'serial_time': serial_time,
+        'parallel_time': parallel_time,
+        'speedup': serial_time / parallel_time if parallel_time else 0.0,
+        'same_moves': agree,
+    }
+
+
+if __name__ == "__main__":
+    # python -m logic.parallel [workers] [depth]
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    # go through the imported module so the pool and the bot share one copy
+    from logic import parallel
+    report = parallel.compare_speedup(workers, depth)
+    print(f"{report['positions']} positions, depth {depth}, {workers} workers")
+    print(f"serial   {report['serial_time']:.2f}s")
+    print(f"parallel {report['parallel_time']:.2f}s")
+    print(f"speedup  {report['speedup']:.2f}x ({report['same_moves']}/{report['positions']} same moves)")
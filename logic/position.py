@@ -0,0 +1,145 @@
+import chess
+from logic import zobrist
+from logic.evaluation import Evaluator
+
+# SEARCH POSITION
+
+class Position(chess.Board):
+    # python-chess board that keeps its zobrist key and static score
+    # (white's point of view) up to date on push/pop
+
+    def __init__(self, fen=chess.STARTING_FEN, evaluator=None, **kwargs):
+        super().__init__(fen, **kwargs)
+        self.root_fen = fen
+        self.evaluator = evaluator or Evaluator()
+        self.key = zobrist.hash_board(self)
+        self.score = self.evaluator.evaluate(self)
+        self.undo_stack = []
+
+    @classmethod
+    def from_board(cls, board, evaluator=None):
+        # replay the game so repetition checks still see the history
+        position = cls(board.root().fen(), evaluator)
+        for move in board.move_stack:
+            position.push(move)
+        return position
+
+    def push(self, move):
+        us = self.turn
+        key = self.key ^ zobrist.TURN_KEY
+        key ^= zobrist.castling_key(self.castling_rights) ^ zobrist.ep_key(self.ep_square)
+        score = self.score
+
+        if move:
+            keys = zobrist.PIECE_KEYS
+            values = self.evaluator.table
+            from_sq, to_sq = move.from_square, move.to_square
+            piece = self.piece_type_at(from_sq)
+
+            if self.is_castling(move):
+                rank = chess.square_rank(from_sq)
+                if chess.square_file(to_sq) > chess.square_file(from_sq):
+                    rook_from, rook_to, king_to = chess.square(7, rank), chess.square(5, rank), chess.square(6, rank)
+                else:
+                    rook_from, rook_to, king_to = chess.square(0, rank), chess.square(3, rank), chess.square(2, rank)
+                key ^= keys[us][chess.KING][from_sq] ^ keys[us][chess.KING][king_to]
+                key ^= keys[us][chess.ROOK][rook_from] ^ keys[us][chess.ROOK][rook_to]
+                score += values[us][chess.KING][king_to] - values[us][chess.KING][from_sq]
+                score += values[us][chess.ROOK][rook_to] - values[us][chess.ROOK][rook_from]
+            else:
+                if self.is_en_passant(move):
+                    captured_sq = to_sq - 8 if us == chess.WHITE else to_sq + 8
+                    key ^= keys[not us][chess.PAWN][captured_sq]
+                    score -= values[not us][chess.PAWN][captured_sq]
+                else:
+                    captured = self.piece_type_at(to_sq)
+                    if captured:
+                        key ^= keys[not us][captured][to_sq]
+                        score -= values[not us][captured][to_sq]
+                promoted = move.promotion or piece
+                key ^= keys[us][piece][from_sq] ^ keys[us][promoted][to_sq]
+                score += values[us][promoted][to_sq] - values[us][piece][from_sq]
+
+        super().push(move)
+
+        key ^= zobrist.castling_key(self.castling_rights) ^ zobrist.ep_key(self.ep_square)
+        self.undo_stack.append((self.key, self.score))
+        self.key = key
+        self.score = score
+
+    def pop(self):
+        move = super().pop()
+        self.key, self.score = self.undo_stack.pop()
+        return move
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board.root_fen = self.root_fen
+        board.evaluator = self.evaluator
+        board.key = self.key
+        board.score = self.score
+        board.undo_stack = self.undo_stack[-len(board.move_stack):] if board.move_stack else []
+        return board
+
+    def is_automatic_draw(self):
+        # the draws is_game_over() reports besides stalemate, with cheap
+        # guards in front of the expensive python-chess checks
+        if not (self.pawns | self.rooks | self.queens) and self.is_insufficient_material():
+            return True
+        if self.halfmove_clock >= 150:
+            return True
+        return self.halfmove_clock >= 16 and self.is_fivefold_repetition()
+
+    def has_legal_moves(self):
+        return any(self.generate_legal_moves())
+
+    def tactical_moves(self):
+        # captures, plus promotions to an empty square
+        moves = list(self.generate_legal_captures())
+        seventh = chess.BB_RANK_7 if self.turn == chess.WHITE else chess.BB_RANK_2
+        moves.extend(self.generate_legal_moves(self.pawns & self.occupied_co[self.turn] & seventh, ~self.occupied))
+        return moves
+
+    def see(self, move):
+        return static_exchange(self, move)
+
+
+def static_exchange(board, move):
+    # static exchange evaluation: material the side to move comes out with
+    # if both sides keep recapturing on the target square with their least
+    # valuable piece; works on Position and BitboardPosition alike
+    values = board.evaluator.material
+    from_sq, to_sq = move.from_square, move.to_square
+    occupied = board.occupied ^ chess.BB_SQUARES[from_sq]
+    
+    if board.is_en_passant(move):
+        captured_sq = to_sq - 8 if board.turn == chess.WHITE else to_sq + 8
+        occupied ^= chess.BB_SQUARES[captured_sq]
+        gains = [values[chess.PAWN]]
+    else:
+        captured = board.piece_type_at(to_sq)
+        gains = [values[captured] if captured else 0]
+    
+    on_square = board.piece_type_at(from_sq)
+    if move.promotion:
+        gains[0] += values[move.promotion] - values[chess.PAWN]
+        on_square = move.promotion
+    
+    color = not board.turn
+    while True:
+        attackers = board.attackers_mask(color, to_sq, occupied) & occupied
+        if not attackers:
+            break
+        for piece_type in chess.PIECE_TYPES:
+            candidates = attackers & board.pieces_mask(piece_type, color)
+            if candidates:
+                break
+        gains.append(values[on_square] - gains[-1])
+        occupied ^= candidates & -candidates
+        on_square = piece_type
+        color = not color
+    
+    # either side may stop recapturing when it would lose by going on
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
\ No newline at end of file
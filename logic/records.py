@@ -0,0 +1,207 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+import chess
+import chess.pgn
+from logic.board import Board
+from logic.transposition import encode_move, decode_move
+
+# GAME RECORDS
+
+# games file: magic, then records appended back to back:
+#   header, white name, black name, start fen (empty for the standard start),
+#   then one 16-bit encoded move per ply
+# index file (path + '.idx'): one 64-bit offset per record, appended after the record
+RECORDS_MAGIC = b'CGR1'
+RECORD_HEADER = struct.Struct('<HBBBHdff')  # plies, result, name lengths, fen length, date, white/black seconds
+OFFSET = struct.Struct('<Q')
+
+RESULTS = ['*', '1-0', '0-1', '1/2-1/2']
+MAX_PLIES = 0xFFFF
+
+
+def index_path(path):
+    return path + '.idx'
+
+
+def encode_name(name):
+    # at most 255 bytes, cut on a character boundary so it always decodes
+    return name.encode()[:255].decode('utf-8', 'ignore').encode()
+
+
+class GameRecorder:
+    def __init__(self, path):
+        # append-only; a new file gets the magic first
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(RECORDS_MAGIC)
+            self.file.flush()
+        self.index = open(index_path(path), 'ab')
+
+    def record(self, engine, white='', black='', result=None, white_time=0.0, black_time=0.0, date=None):
+        # appends the game of a python-chess board, from its root position
+        root = engine.root()
+        start_fen = b'' if root.fen() == chess.STARTING_FEN else root.fen().encode()
+        return self.append(engine.move_stack, white, black, result or engine.result(), white_time, black_time, date, start_fen)
+
+    def append(self, moves, white='', black='', result='*', white_time=0.0, black_time=0.0, date=None, start_fen=b''):
+        # returns the game number
+        white, black = encode_name(white), encode_name(black)
+        moves = array('H', (encode_move(move) for move in moves[:MAX_PLIES]))
+        if sys.byteorder == 'big':
+            moves.byteswap()
+
+        header = RECORD_HEADER.pack(len(moves), RESULTS.index(result), len(white), len(black), len(start_fen),
+                                    date if date is not None else time.time(), white_time, black_time)
+
+        # the index entry is written last, so a record cut short by a crash is
+        # never listed
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(header + white + black + start_fen + moves.tobytes())
+        self.file.flush()
+        self.index.write(OFFSET.pack(offset))
+        self.index.flush()
+        return self.index.tell() // OFFSET.size - 1
+
+    def close(self):
+        self.file.close()
+        self.index.close()
+
+
+class GameStore:
+    def __init__(self, path):
+        # both files mapped read-only; a game is only decoded when asked for.
+        # the index is mapped first: every game it lists is then already in
+        # the data, even with a recorder appending at the same time
+        self.path = path
+        self.index = None
+        self.count = 0
+        if os.path.exists(index_path(path)) and os.path.getsize(index_path(path)):
+            with open(index_path(path), 'rb') as f:
+                self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.count = len(self.index) // OFFSET.size
+
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(RECORDS_MAGIC)] != RECORDS_MAGIC:
+            self.close()
+            raise ValueError(f"not a game record file: {path}")
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return OFFSET.unpack_from(self.index, i * OFFSET.size)[0]
+
+    def header(self, i):
+        offset = self.offset(i)
+        plies, result, white_len, black_len, fen_len, date, white_time, black_time = RECORD_HEADER.unpack_from(self.data, offset)
+        pos = offset + RECORD_HEADER.size
+        white = self.data[pos:pos + white_len].decode()
+        black = self.data[pos + white_len:pos + white_len + black_len].decode()
+        pos += white_len + black_len
+        fen = self.data[pos:pos + fen_len].decode() or chess.STARTING_FEN
+        return {
+            'white': white,
+            'black': black,
+            'result': RESULTS[result],
+            'plies': plies,
+            'date': date,
+            'white_time': white_time,
+            'black_time': black_time,
+            'fen': fen,
+            'moves_at': pos + fen_len,
+        }
+
+    def moves(self, i, header=None):
+        header = header or self.header(i)
+        codes = array('H')
+        codes.frombytes(self.data[header['moves_at']:header['moves_at'] + 2 * header['plies']])
+        if sys.byteorder == 'big':
+            codes.byteswap()
+        return [decode_move(code) for code in codes]
+
+    def replay(self, i, plies=None):
+        # the game (or its first plies) played into a fresh Board
+        header = self.header(i)
+        board = Board()
+        board.engine = chess.Board(header['fen'])
+        for move in self.moves(i, header)[:plies]:
+            board.push(move)
+        return board
+
+    def to_pgn(self, i):
+        header = self.header(i)
+        game = chess.pgn.Game()
+        game.headers['Event'] = 'Chess Project'
+        game.headers['Date'] = time.strftime('%Y.%m.%d', time.localtime(header['date']))
+        game.headers['Round'] = str(i + 1)
+        game.headers['White'] = header['white'] or '?'
+        game.headers['Black'] = header['black'] or '?'
+        game.headers['Result'] = header['result']
+        if header['fen'] != chess.STARTING_FEN:
+            game.setup(chess.Board(header['fen']))
+        node = game
+        for move in self.moves(i, header):
+            node = node.add_variation(move)
+        return game
+
+    def export_pgn(self, out, games=None):
+        # games: iterable of game numbers, all by default
+        exporter = chess.pgn.FileExporter(out)
+        count = 0
+        for i in range(self.count) if games is None else games:
+            self.to_pgn(i).accept(exporter)
+            count += 1
+        return count
+
+    def close(self):
+        self.data.close()
+        if self.index:
+            self.index.close()
+
+
+if __name__ == "__main__":
+    # python -m logic.records info games.bin
+    # python -m logic.records show games.bin 12
+    # python -m logic.records export games.bin -o games.pgn
+    parser = argparse.ArgumentParser(description="binary game records")
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info')
+    info.add_argument('path')
+    show = commands.add_parser('show')
+    show.add_argument('path')
+    show.add_argument('game', type=int)
+    export = commands.add_parser('export')
+    export.add_argument('path')
+    export.add_argument('-o', '--out', default='games.pgn')
+    export.add_argument('--first', type=int, default=None, help="only the first N games")
+    options = parser.parse_args()
+
+    store = GameStore(options.path)
+    if options.command == 'info':
+        results = {}
+        plies = 0
+        for i in range(len(store)):
+            header = store.header(i)
+            results[header['result']] = results.get(header['result'], 0) + 1
+            plies += header['plies']
+        print(f"{len(store)} games, {plies} plies, {os.path.getsize(options.path)} bytes")
+        for result, count in results.items():
+            print(f"{result:8} {count}")
+    elif options.command == 'show':
+        print(store.to_pgn(options.game))
+        print(store.replay(options.game).engine)
+    else:
+        games = range(min(options.first, len(store))) if options.first is not None else None
+        with open(options.out, 'w', encoding='utf-8') as f:
+            count = store.export_pgn(f, games)
+        print(f"{count} games -> {options.out}")
+    store.close()
\ No newline at end of file
@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import chess
+from logic.board import Board
+from logic.tournament import make_agent
+from logic.uci import to_move
+
+# GAME SERVER
+
+# protocol: one json object per line each way. requests carry an "op" and an
+# optional "id" echoed in the reply; moves are also pushed as events
+#   {"op": "new_game", "white": "human", "black": "MinimaxBot(6)", "time": 300, "increment": 3, "move_time": 2}
+#   {"op": "move", "game": 1, "move": "e2e4"}
+#   {"op": "state" | "watch" | "resign", "game": 1}
+#   {"op": "list"} / {"op": "stats"}
+#   event: {"event": "move", "game": 1, "ply": 1, "move": "e7e5", "fen": ..., "result": null}
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MOVE_TIME = 1.0  # seconds per bot move when a game sets no budget
+FLAG_CHECK_SECONDS = 0.25
+LATENCY_SAMPLES = 1000
+
+# each worker process keeps one agent per spec, so tables carry over between moves
+_worker_agents = {}
+
+
+def _search_move(spec, root_fen, ucis, move_time, clock):
+    # runs in a pool worker: (uci or None, nodes, seconds)
+    agent = _worker_agents.get(spec)
+    if agent is None:
+        agent = _worker_agents[spec] = make_agent(spec)
+        agent.default_time_limit = getattr(agent, 'time_limit', None)
+
+    board = Board()
+    board.engine = chess.Board(root_fen)
+    for uci in ucis:
+        board.engine.push_uci(uci)
+    agent.set_color(board.engine.turn)
+    agent.set_clock(*clock)
+    # the game's budget caps the agent's own limit
+    if hasattr(agent, 'time_limit'):
+        agent.time_limit = min(agent.default_time_limit or move_time, move_time)
+
+    start = time.perf_counter()
+    coords = agent.get_move(board)
+    seconds = time.perf_counter() - start
+    if coords is None:
+        return None, 0, seconds
+    move = to_move(board.engine, coords)
+    nodes = getattr(agent, 'nodes', 0) + getattr(agent, 'qnodes', 0)
+    return move.uci() if move else None, nodes, seconds
+
+
+class LatencyStats:
+    # running count/mean/max plus recent samples for percentiles, in seconds
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+    def to_dict(self):
+        # milliseconds
+        return {
+            'count': self.count,
+            'mean_ms': round(1000 * self.total / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(1000 * self.percentile(0.5), 2),
+            'p95_ms': round(1000 * self.percentile(0.95), 2),
+            'max_ms': round(1000 * self.max, 2),
+        }
+
+
+# latency kinds: requests handled, time a bot move waited for a worker, search
+# time in the worker, and bot turn start to the move being sent out
+LATENCY_KINDS = ('request', 'queue', 'search', 'reply')
+
+
+class GameSession:
+    def __init__(self, game_id, white, black, base_time=None, increment=0, move_time=MOVE_TIME):
+        self.id = game_id
+        self.board = Board()
+        self.players = {chess.WHITE: white, chess.BLACK: black}  # agent spec, None for a human
+        self.move_time = move_time
+        self.base_time = base_time
+        self.increment = increment
+        self.time_left = {chess.WHITE: base_time, chess.BLACK: base_time}
+        self.turn_start = time.perf_counter()
+        self.result = None
+        self.searching = False
+        self.queued_at = 0.0
+        self.watchers = set()
+        self.nodes = 0
+        self.latency = {kind: LatencyStats() for kind in LATENCY_KINDS}
+
+    @property
+    def bot_to_move(self):
+        return self.players[self.board.engine.turn]
+
+    def clock_remaining(self, color):
+        if self.base_time is None:
+            return None
+        remaining = self.time_left[color]
+        if color == self.board.engine.turn and self.result is None:
+            remaining -= time.perf_counter() - self.turn_start
+        return max(remaining, 0.0)
+
+    def push(self, move, seconds=None):
+        # charges the mover's clock (seconds overrides the wall time, for bots)
+        color = self.board.engine.turn
+        if self.base_time is not None:
+            used = time.perf_counter() - self.turn_start if seconds is None else seconds
+            self.time_left[color] = max(self.time_left[color] - used, 0.0) + self.increment
+        self.board.push(move)
+        self.turn_start = time.perf_counter()
+        if self.board.is_game_over():
+            self.result = self.board.engine.result()
+
+    def flag(self, color):
+        self.time_left[color] = 0.0
+        self.result = '0-1' if color == chess.WHITE else '1-0'
+
+    def to_dict(self):
+        engine = self.board.engine
+        return {
+            'game': self.id,
+            'white': self.players[chess.WHITE] or 'human',
+            'black': self.players[chess.BLACK] or 'human',
+            'fen': engine.fen(),
+            'moves': [move.uci() for move in engine.move_stack],
+            'turn': 'white' if engine.turn == chess.WHITE else 'black',
+            'result': self.result,
+            'clock': {'white': self.clock_remaining(chess.WHITE), 'black': self.clock_remaining(chess.BLACK)},
+            'nodes': self.nodes,
+            'latency': {kind: stats.to_dict() for kind, stats in self.latency.items()},
+        }
+
+
+class GameServer:
+    def __init__(self, workers=None, move_time=MOVE_TIME):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.move_time = move_time
+        self.sessions = {}
+        self.next_id = 1
+        self.valid_specs = set()
+        self.pool = None
+        self.ready = None  # sessions whose bot is to move, first come first served
+        self.latency = {kind: LatencyStats() for kind in LATENCY_KINDS}
+        self.started = time.perf_counter()
+        self.moves = 0
+        self.tasks = []
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.ready = asyncio.Queue()
+        # one dispatcher per worker: never more searches than processes, and
+        # the queue hands workers out to games in turn
+        self.tasks = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.check_flags()))
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+
+    # BOT MOVES
+
+    def schedule(self, session):
+        if session.result is None and session.bot_to_move and not session.searching:
+            session.searching = True
+            session.queued_at = time.perf_counter()
+            self.ready.put_nowait(session)
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            session = await self.ready.get()
+            if session.result is not None:
+                session.searching = False
+                continue
+            picked = time.perf_counter()
+            self.add_latency(session, 'queue', picked - session.queued_at)
+
+            engine = session.board.engine
+            color = engine.turn
+            remaining = session.clock_remaining(color)
+            # a per-move budget, never more than a fair share of the clock
+            move_time = session.move_time if remaining is None else min(session.move_time, max(remaining / 10, 0.01))
+            clock = (remaining, session.increment) if remaining is not None else (None, 0)
+            try:
+                uci, nodes, seconds = await loop.run_in_executor(
+                    self.pool, _search_move, session.bot_to_move, engine.root().fen(),
+                    [move.uci() for move in engine.move_stack], move_time, clock)
+            except Exception as e:
+                print(f"game {session.id}: search failed: {e!r}")
+                uci, nodes, seconds = None, 0, 0.0
+            session.searching = False
+            if session.result is not None:
+                continue
+
+            self.add_latency(session, 'search', seconds)
+            if uci is None or (remaining is not None and seconds > remaining):
+                # no move (a failed agent) or over the clock: the bot loses
+                session.flag(color)
+                uci = None
+            else:
+                session.nodes += nodes
+                session.push(chess.Move.from_uci(uci), seconds)
+                self.moves += 1
+            self.add_latency(session, 'reply', time.perf_counter() - session.queued_at)
+            await self.broadcast(session, uci)
+            self.schedule(session)
+
+    async def check_flags(self):
+        # human clocks run out between messages
+        while True:
+            await asyncio.sleep(FLAG_CHECK_SECONDS)
+            for session in list(self.sessions.values()):
+                if session.result is None and session.base_time is not None and not session.bot_to_move:
+                    color = session.board.engine.turn
+                    if session.clock_remaining(color) <= 0:
+                        session.flag(color)
+                        await self.broadcast(session, None)
+
+    def add_latency(self, session, kind, seconds):
+        session.latency[kind].add(seconds)
+        self.latency[kind].add(seconds)
+
+    async def broadcast(self, session, uci):
+        engine = session.board.engine
+        event = {'event': 'move', 'game': session.id, 'ply': len(engine.move_stack), 'move': uci,
+                 'fen': engine.fen(), 'result': session.result,
+                 'clock': {'white': session.clock_remaining(chess.WHITE), 'black': session.clock_remaining(chess.BLACK)}}
+        line = (json.dumps(event) + '\n').encode()
+        for writer in list(session.watchers):
+            try:
+                writer.write(line)
+                await writer.drain()
+            except (ConnectionError, RuntimeError):
+                session.watchers.discard(writer)
+
+    # REQUESTS
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a json object")
+                    reply = await self.handle(request, writer)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {'ok': False, 'error': str(e) or type(e).__name__}
+                if 'id' in request:
+                    reply['id'] = request['id']
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+
+                session = self.sessions.get(request.get('game', reply.get('game')))
+                if session:
+                    session.latency['request'].add(time.perf_counter() - start)
+                self.latency['request'].add(time.perf_counter() - start)
+        except ConnectionError:
+            pass
+        finally:
+            for session in self.sessions.values():
+                session.watchers.discard(writer)
+            writer.close()
+
+    def session(self, request):
+        session = self.sessions.get(request['game'])
+        if session is None:
+            raise KeyError(f"no game {request['game']}")
+        return session
+
+    async def handle(self, request, writer):
+        op = request.get('op')
+        if op == 'new_game':
+            players = []
+            for color in ('white', 'black'):
+                spec = request.get(color, 'human')
+                if spec != 'human' and spec not in self.valid_specs:
+                    # reject bad specs here, not in a worker
+                    agent = make_agent(spec)
+                    if hasattr(agent, 'close'): agent.close()
+                    self.valid_specs.add(spec)
+                players.append(None if spec == 'human' else spec)
+            session = GameSession(self.next_id, players[0], players[1], request.get('time'),
+                                  request.get('increment', 0), request.get('move_time', self.move_time))
+            self.sessions[session.id] = session
+            self.next_id += 1
+            session.watchers.add(writer)
+            self.schedule(session)
+            return {'ok': True, **session.to_dict()}
+
+        if op == 'move':
+            session = self.session(request)
+            engine = session.board.engine
+            if session.result is not None:
+                return {'ok': False, 'error': 'game over', 'game': session.id}
+            if session.bot_to_move:
+                return {'ok': False, 'error': 'not your turn', 'game': session.id}
+            move = chess.Move.from_uci(request['move'])
+            if move not in engine.legal_moves:
+                return {'ok': False, 'error': f"illegal move {request['move']}", 'game': session.id}
+            session.push(move)
+            self.moves += 1
+            await self.broadcast(session, move.uci())
+            self.schedule(session)
+            return {'ok': True, 'game': session.id, 'ply': len(engine.move_stack)}
+
+        if op == 'state':
+            return {'ok': True, **self.session(request).to_dict()}
+
+        if op == 'watch':
+            session = self.session(request)
+            session.watchers.add(writer)
+            return {'ok': True, **session.to_dict()}
+
+        if op == 'resign':
+            # "color" resigns, the side to move by default
+            session = self.session(request)
+            if session.result is None:
+                color = request.get('color', 'white' if session.board.engine.turn == chess.WHITE else 'black')
+                session.result = '0-1' if color == 'white' else '1-0'
+                await self.broadcast(session, None)
+            return {'ok': True, 'game': session.id, 'result': session.result}
+
+        if op == 'list':
+            return {'ok': True, 'games': [{'game': s.id, 'white': s.players[chess.WHITE] or 'human',
+                                           'black': s.players[chess.BLACK] or 'human', 'result': s.result,
+                                           'plies': len(s.board.engine.move_stack)}
+                                          for s in self.sessions.values()]}
+
+        if op == 'stats':
+            return {'ok': True, **self.stats()}
+
+        return {'ok': False, 'error': f"unknown op {op}"}
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        active = sum(1 for session in self.sessions.values() if session.result is None)
+        return {
+            'games': len(self.sessions),
+            'active': active,
+            'moves': self.moves,
+            'moves_per_sec': round(self.moves / elapsed, 2) if elapsed else 0.0,
+            'queued': self.ready.qsize() if self.ready else 0,
+            'workers': self.workers,
+            'latency': {kind: stats.to_dict() for kind, stats in self.latency.items()},
+            'per_game': {session.id: {kind: stats.to_dict() for kind, stats in session.latency.items()}
+                         for session in self.sessions.values()},
+        }
+
+
+async def serve(host, port, workers, move_time):
+    server = GameServer(workers, move_time)
+    listener = await server.start(host, port)
+    print(f"serving on {host}:{port} with {server.workers} workers")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    # python -m logic.server --port 8765 --workers 4
+    parser = argparse.ArgumentParser(description="headless multi-game server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--move-time", type=float, default=MOVE_TIME, help="default seconds per bot move")
+    options = parser.parse_args()
+    try:
+        asyncio.run(serve(options.host, options.port, options.workers, options.move_time))
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
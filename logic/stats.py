@@ -0,0 +1,132 @@
+import json
+import time
+from logic.evaluation import MATE_SCORE
+
+# SEARCH STATISTICS
+
+class SearchStats:
+    def __init__(self, bot, source='search'):
+        # counters are read from the bot, tt counters relative to the start
+        self.source = source  # 'search', 'book' or 'bitbase'
+        self.start = time.perf_counter()
+        self.unit = bot.evaluator.unit
+        self.tt_probes_start = bot.tt.probes
+        self.tt_hits_start = bot.tt.hits
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.tt_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+
+        # one entry per finished iteration
+        self.iterations = []
+        self.last_totals = (0, 0, 0.0)
+        self.depth = 0
+        self.score = None
+        self.pv = []
+        self.done = False
+
+    def sample(self, bot):
+        # copy the running counters; cheap enough to call while the search runs
+        self.elapsed = time.perf_counter() - self.start
+        self.nodes = bot.nodes
+        self.qnodes = bot.qnodes
+        self.cutoffs = bot.cutoffs
+        self.first_cutoffs = bot.first_cutoffs
+        self.tt_cutoffs = bot.tt_cutoffs
+        self.tt_probes = bot.tt.probes - self.tt_probes_start + bot.worker_tt_probes
+        self.tt_hits = bot.tt.hits - self.tt_hits_start + bot.worker_tt_hits
+
+    def end_iteration(self, bot, depth, score, pv):
+        # nodes and time spent on this iteration alone
+        self.sample(bot)
+        nodes, qnodes, elapsed = self.last_totals
+        self.iterations.append({
+            'depth': depth,
+            'nodes': self.nodes - nodes,
+            'qnodes': self.qnodes - qnodes,
+            'time': round(self.elapsed - elapsed, 4),
+            'score': self.score_cp(score),
+            'pv': [move.uci() for move in pv],
+        })
+        self.last_totals = (self.nodes, self.qnodes, self.elapsed)
+        self.depth = depth
+        self.score = score
+        self.pv = pv
+
+    def finish(self, bot, move=None):
+        self.sample(bot)
+        if move is not None and not self.pv:
+            self.pv = [move]
+        self.done = True
+
+    def score_cp(self, score):
+        # centipawns from the side to move, or +-mate
+        if score is None:
+            return None
+        if abs(score) >= MATE_SCORE:
+            return 'mate' if score > 0 else '-mate'
+        return score * 100 // self.unit
+
+    @property
+    def nps(self):
+        return (self.nodes + self.qnodes) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def branching_factor(self):
+        # effective branching factor: growth of the last iteration over the one before
+        if len(self.iterations) < 2:
+            return 0.0
+        last, before = self.iterations[-1], self.iterations[-2]
+        before_nodes = before['nodes'] + before['qnodes']
+        return (last['nodes'] + last['qnodes']) / before_nodes if before_nodes else 0.0
+
+    @property
+    def cutoff_rate(self):
+        return self.cutoffs / self.nodes if self.nodes else 0.0
+
+    @property
+    def first_cutoff_rate(self):
+        # share of beta cutoffs made by the first move tried: move ordering quality
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'done': self.done,
+            'depth': self.depth,
+            'score': self.score_cp(self.score),
+            'pv': [move.uci() for move in self.pv],
+            'time': round(self.elapsed, 4),
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'nps': round(self.nps),
+            'branching_factor': round(self.branching_factor, 2),
+            'cutoff_rate': round(self.cutoff_rate, 4),
+            'first_cutoff_rate': round(self.first_cutoff_rate, 4),
+            'tt_cutoffs': self.tt_cutoffs,
+            'tt_probes': self.tt_probes,
+            'tt_hit_rate': round(self.tt_hit_rate, 4),
+            'iterations': self.iterations,
+        }
+
+
+class JsonLinesLog:
+    # stats callback: appends one json object per report to a file
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, stats):
+        self.file.write(json.dumps(stats.to_dict()) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
\ No newline at end of file
@@ -0,0 +1,207 @@
+import argparse
+import ast
+import json
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import chess
+from logic import agents
+from logic.board import Board
+from logic.records import GameRecorder
+
+# HEADLESS MATCHES
+
+MAX_PLIES = 400  # adjudicated as a draw after this many plies
+
+
+def make_agent(spec):
+    # "MinimaxBot(3, time_limit=0.5)" -> instance, without eval(): only
+    # Agent subclasses from logic.agents and literal arguments are allowed
+    try:
+        call = ast.parse(spec, mode='eval').body
+    except SyntaxError:
+        raise ValueError(f"bad agent spec: {spec}")
+    if isinstance(call, ast.Name):
+        call = ast.Call(func=call, args=[], keywords=[])
+    if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Name):
+        raise ValueError(f"bad agent spec: {spec}")
+    cls = getattr(agents, call.func.id, None)
+    if not (isinstance(cls, type) and issubclass(cls, agents.Agent)):
+        raise ValueError(f"unknown agent: {call.func.id}")
+    args = [ast.literal_eval(arg) for arg in call.args]
+    kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in call.keywords}
+    return cls(*args, **kwargs)
+
+
+def random_opening(plies, seed):
+    # a few random legal moves from the start position, as uci strings
+    rng = random.Random(seed)
+    board = chess.Board()
+    moves = []
+    for _ in range(plies):
+        legal = list(board.legal_moves)
+        if not legal:
+            break
+        move = rng.choice(legal)
+        board.push(move)
+        moves.append(move.uci())
+    return moves
+
+
+def play_game(white_spec, black_spec, opening):
+    # plays one game; returns the result and per-colour timing
+    board = Board()
+    for uci in opening:
+        board.engine.push_uci(uci)
+
+    players = {chess.WHITE: make_agent(white_spec), chess.BLACK: make_agent(black_spec)}
+    for color, agent in players.items():
+        agent.set_color(color)
+    stats = {color: {'moves': 0, 'time': 0.0, 'nodes': 0} for color in players}
+
+    while not board.is_game_over() and len(board.engine.move_stack) < MAX_PLIES:
+        color = board.is_turn
+        agent = players[color]
+        start = time.perf_counter()
+        move = agent.get_move(board)
+        stats[color]['time'] += time.perf_counter() - start
+        stats[color]['moves'] += 1
+        stats[color]['nodes'] += getattr(agent, 'nodes', 0) + getattr(agent, 'qnodes', 0)
+        if move is None:
+            break
+        board.move_piece(*move)
+
+    for agent in players.values():
+        if hasattr(agent, 'close'):
+            agent.close()
+
+    outcome = board.engine.outcome()
+    winner = outcome.winner if outcome else None
+    return {
+        'result': board.engine.result() if outcome else '1/2-1/2',
+        'winner': winner,
+        'plies': len(board.engine.move_stack),
+        'moves': [move.uci() for move in board.engine.move_stack],
+        'stats': {'white': stats[chess.WHITE], 'black': stats[chess.BLACK]},
+    }
+
+
+def _play_pair_game(spec_a, spec_b, a_is_white, opening):
+    if a_is_white:
+        game = play_game(spec_a, spec_b, opening)
+        a_color, b_color = 'white', 'black'
+    else:
+        game = play_game(spec_b, spec_a, opening)
+        a_color, b_color = 'black', 'white'
+    if game['winner'] is None:
+        score = 0.5
+    else:
+        score = 1.0 if game['winner'] == a_is_white else 0.0
+    return score, game['stats'][a_color], game['stats'][b_color], game, a_is_white
+
+
+def elo_difference(wins, draws, losses):
+    # elo of A over B with a 95% interval, from the per-game score variance
+    games = wins + draws + losses
+    if not games:
+        return 0.0, 0.0, 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+
+    def to_elo(p):
+        p = min(max(p, 1e-6), 1 - 1e-6)
+        return -400 * math.log10(1 / p - 1)
+
+    return to_elo(score), to_elo(score - margin), to_elo(score + margin)
+
+
+def run_match(spec_a, spec_b, games, workers=None, opening_plies=4, seed=0, record=None):
+    # games are played in colour-swapped pairs from the same random opening;
+    # record is a game record file the finished games are appended to
+    workers = workers or multiprocessing.cpu_count()
+    recorder = GameRecorder(record) if record else None
+    wins = draws = losses = 0
+    totals = {'a': {'moves': 0, 'time': 0.0, 'nodes': 0}, 'b': {'moves': 0, 'time': 0.0, 'nodes': 0}}
+    plies = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for i in range(games):
+            opening = random_opening(opening_plies, seed + i // 2)
+            futures.append(pool.submit(_play_pair_game, spec_a, spec_b, i % 2 == 0, opening))
+        for future in as_completed(futures):
+            score, a_stats, b_stats, game, a_is_white = future.result()
+            if score == 1.0:
+                wins += 1
+            elif score == 0.0:
+                losses += 1
+            else:
+                draws += 1
+            for side, side_stats in (('a', a_stats), ('b', b_stats)):
+                for field in side_stats:
+                    totals[side][field] += side_stats[field]
+            plies += game['plies']
+            
+            # written here, in the parent, so the file has a single writer
+            if recorder:
+                white, black = (spec_a, spec_b) if a_is_white else (spec_b, spec_a)
+                stats = game['stats']
+                recorder.append([chess.Move.from_uci(uci) for uci in game['moves']], white, black, game['result'],
+                                stats['white']['time'], stats['black']['time'])
+    
+    if recorder:
+        recorder.close()
+
+    elo, elo_low, elo_high = elo_difference(wins, draws, losses)
+
+    def summary(side):
+        t = totals[side]
+        return {
+            'avg_move_ms': 1000 * t['time'] / t['moves'] if t['moves'] else 0.0,
+            'nodes_per_sec': t['nodes'] / t['time'] if t['time'] else 0.0,
+        }
+
+    return {
+        'a': spec_a,
+        'b': spec_b,
+        'games': games,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'elo': elo,
+        'elo_low': elo_low,
+        'elo_high': elo_high,
+        'avg_plies': plies / games if games else 0.0,
+        'wall_time': time.perf_counter() - start,
+        'agent_a': summary('a'),
+        'agent_b': summary('b'),
+    }
+
+
+if __name__ == "__main__":
+    # python -m logic.tournament "MinimaxBot(3)" "RandomBot(0)" --games 1000
+    parser = argparse.ArgumentParser(description="headless match between two agents")
+    parser.add_argument("a")
+    parser.add_argument("b")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--opening-plies", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as json")
+    parser.add_argument("--record", help="append every game to this game record file")
+    options = parser.parse_args()
+
+    report = run_match(options.a, options.b, options.games, options.workers, options.opening_plies, options.seed, options.record)
+    print(f"{report['a']} vs {report['b']}: +{report['wins']} ={report['draws']} -{report['losses']}")
+    print(f"elo {report['elo']:+.0f} [{report['elo_low']:+.0f}, {report['elo_high']:+.0f}]")
+    for side in ('a', 'b'):
+        s = report['agent_' + side]
+        print(f"{report[side]}: {s['avg_move_ms']:.1f} ms/move, {s['nodes_per_sec']:.0f} nodes/s")
+    print(f"{report['wall_time']:.1f}s, {report['avg_plies']:.0f} plies/game")
+    if options.out:
+        with open(options.out, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,104 @@
+from array import array
+import chess
+
+# MOVE ENCODING
+
+# 16 bits: from square (6) | to square (6) | promotion piece type (3)
+def encode_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    if not code:
+        return None
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+
+# TRANSPOSITION TABLE
+
+EXACT = 0
+LOWER = 1   # score is a lower bound (fail high)
+UPPER = 2   # score is an upper bound (fail low)
+
+# each entry is two 64-bit words: the full key and the packed data
+ENTRY_BYTES = 16
+SCORE_OFFSET = 1 << 19
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        # round down to a power of two so the slot is a mask of the key
+        entries = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.data = array('q', bytes(8 * self.size))
+        self.generation = 0
+        
+        # counters
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        # entries from older searches become first in line for replacement
+        self.generation = (self.generation + 1) & 255
+
+    def clear(self):
+        self.keys = array('Q', bytes(8 * self.size))
+        self.data = array('q', bytes(8 * self.size))
+        self.generation = 0
+
+    def probe(self, key):
+        # returns (depth, bound, score, move) or None
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] != key:
+            return None
+        data = self.data[slot]
+        if not data:
+            return None
+        self.hits += 1
+        return ((data >> 8) & 255,
+                (data >> 16) & 3,
+                ((data >> 18) & 0xFFFFF) - SCORE_OFFSET,
+                decode_move((data >> 38) & 0xFFFF))
+
+    def store(self, key, depth, bound, score, move):
+        slot = key & self.mask
+        old = self.data[slot]
+        
+        # replacement policy: keep the deeper entry unless it is stale
+        if old and self.keys[slot] != key:
+            if (old & 255) == self.generation and ((old >> 8) & 255) > depth:
+                return
+            self.overwrites += 1
+        elif old and move is None:
+            # same position, keep the best move we already know
+            move = decode_move((old >> 38) & 0xFFFF)
+
+        self.stores += 1
+        self.keys[slot] = key
+        self.data[slot] = (self.generation
+                           | (depth << 8)
+                           | (bound << 16)
+                           | ((score + SCORE_OFFSET) << 18)
+                           | ((encode_move(move) if move else 0) << 38))
+
+    @property
+    def misses(self):
+        return self.probes - self.hits
+
+    def stats(self):
+        used = sum(1 for data in self.data[:1000] if data) / min(self.size, 1000)
+        return {
+            'size_mb': self.size * ENTRY_BYTES / (1024 * 1024),
+            'entries': self.size,
+            'probes': self.probes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'stores': self.stores,
+            'overwrites': self.overwrites,
+            'fill': used,
+        }
@@ -0,0 +1,196 @@
+import sys
+import threading
+import chess
+from logic.agents import CancelToken, MinimaxBot
+from logic.board import Board
+from logic.tournament import make_agent
+
+# UCI ENGINE
+
+ENGINE_NAME = "Chess Project"
+ENGINE_AUTHOR = "Liav Moruga"
+INFINITE_DEPTH = 64
+
+
+def to_move(engine, coords):
+    # agent coordinates -> legal move, queen first when several promote
+    (sr, sc), (er, ec) = coords
+    start, end = chess.square(sc, 7 - sr), chess.square(ec, 7 - er)
+    moves = [move for move in engine.legal_moves if move.from_square == start and move.to_square == end]
+    return max(moves, key=lambda move: move.promotion or 0) if moves else None
+
+
+class UciEngine:
+    def __init__(self, agent, out=sys.stdout):
+        # any Agent; depth and time limits are only set on agents that have them
+        self.agent = agent
+        self.out = out
+        self.lock = threading.Lock()  # info lines come from the search thread
+        self.board = Board()
+        self.search_thread = None
+        self.token = None
+        self.default_depth = getattr(agent, 'depth', None)
+        self.default_time_limit = getattr(agent, 'time_limit', None)
+        if hasattr(agent, 'on_stats'):
+            agent.on_stats = self.send_info
+
+    def send(self, line):
+        with self.lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+    def send_info(self, stats):
+        if stats.source != 'search':
+            self.send(f"info string {stats.source} move")
+            return
+        if not stats.iterations or stats.done:
+            return
+        score = stats.score_cp(stats.score)
+        if score == 'mate':
+            score = f"mate {max(1, (len(stats.pv) + 1) // 2)}"
+        elif score == '-mate':
+            score = f"mate -{max(1, len(stats.pv) // 2)}"
+        else:
+            score = f"cp {score}"
+        nodes = stats.nodes + stats.qnodes
+        pv = " ".join(move.uci() for move in stats.pv)
+        self.send(f"info depth {stats.depth} score {score} nodes {nodes} nps {int(stats.nps)} "
+                  f"time {int(stats.elapsed * 1000)} hashfull {self.hashfull()} pv {pv}")
+
+    def hashfull(self):
+        # permille of used entries, sampled from the first thousand slots
+        tt = getattr(self.agent, 'tt', None)
+        if tt is None:
+            return 0
+        sample = min(1000, tt.size)
+        return sum(1 for i in range(sample) if tt.data[i]) * 1000 // sample
+
+    # COMMANDS
+
+    def run(self, lines=sys.stdin):
+        # commands are read here while the search runs in its own thread,
+        # so stop and isready are answered at once
+        for line in lines:
+            if not self.handle(line.strip()):
+                break
+        self.stop()
+
+    def handle(self, line):
+        # returns False on quit
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            if hasattr(self.agent, 'tt'):
+                self.send(f"option name Hash type spin default {self.agent.tt_size_mb} min 1 max 1024")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self.stop()
+            if hasattr(self.agent, 'tt'):
+                self.agent.tt.clear()
+        elif command == 'setoption':
+            self.set_option(args)
+        elif command == 'position':
+            self.stop()
+            self.set_position(args)
+        elif command == 'go':
+            self.stop()
+            self.go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'quit':
+            return False
+        return True
+
+    def set_option(self, args):
+        # setoption name Hash value 64
+        if 'value' not in args: return
+        name = " ".join(args[1:args.index('value')]).lower()
+        value = " ".join(args[args.index('value') + 1:])
+        if name == 'hash' and isinstance(self.agent, MinimaxBot):
+            self.stop()
+            self.agent.tt_size_mb = int(value)
+            self.agent.tt = type(self.agent.tt)(int(value))
+
+    def set_position(self, args):
+        # position startpos|fen <fen> [moves ...]
+        moves = args.index('moves') if 'moves' in args else len(args)
+        if args and args[0] == 'fen':
+            engine = chess.Board(" ".join(args[1:moves]))
+        else:
+            engine = chess.Board()
+        for uci in args[moves + 1:]:
+            engine.push_uci(uci)
+        self.board = Board()
+        self.board.engine = engine
+
+    def go(self, args):
+        # go [depth N] [movetime MS] [wtime MS btime MS winc MS binc MS] [infinite]
+        params = {}
+        for i, word in enumerate(args[:-1]):
+            if word in ('depth', 'movetime', 'wtime', 'btime', 'winc', 'binc'):
+                params[word] = int(args[i + 1])
+        agent = self.agent
+        turn = self.board.engine.turn
+        agent.set_color(turn)
+
+        depth = self.default_depth
+        time_limit = self.default_time_limit
+        clock = (None, 0)
+        if 'infinite' in args:
+            depth, time_limit = INFINITE_DEPTH, None
+        if 'depth' in params:
+            depth = params['depth']
+            time_limit = None
+        if 'movetime' in params:
+            time_limit = params['movetime'] / 1000
+            depth = depth if 'depth' in params else INFINITE_DEPTH
+        side = 'w' if turn == chess.WHITE else 'b'
+        if side + 'time' in params:
+            clock = (params[side + 'time'] / 1000, params.get(side + 'inc', 0) / 1000)
+
+        if hasattr(agent, 'depth') and depth is not None:
+            agent.depth = depth
+        if hasattr(agent, 'time_limit'):
+            agent.time_limit = time_limit
+        agent.set_clock(*clock)
+
+        self.token = CancelToken()
+        infinite = 'infinite' in args
+        self.search_thread = threading.Thread(target=self.search, args=(self.board, self.token, infinite), daemon=True)
+        self.search_thread.start()
+
+    def search(self, board, token, infinite=False):
+        engine = board.engine
+        coords = self.agent.get_move(board, token)
+        move = to_move(engine, coords) if coords else None
+        if move is None:
+            # cut before any move was found: still answer with a legal one
+            move = next(iter(engine.legal_moves), None)
+        # go infinite answers only after stop (or quit), even when the search
+        # ended by itself, e.g. on a mate or a book move
+        while infinite and not token.wait(0.05):
+            pass
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    def stop(self):
+        # cancels the search and waits for its bestmove
+        if self.search_thread:
+            self.token.cancel()
+            self.search_thread.join()
+            self.search_thread = None
+
+
+if __name__ == "__main__":
+    # python -m logic.uci "MinimaxBot(8)"
+    spec = sys.argv[1] if len(sys.argv) > 1 else "MinimaxBot(8)"
+    engine = UciEngine(make_agent(spec))
+    engine.run()
+    if hasattr(engine.agent, 'close'):
+        engine.agent.close()
\ No newline at end of file
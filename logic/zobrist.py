@@ -0,0 +1,40 @@
+import random
+import chess
+
+# ZOBRIST KEYS
+
+# fixed seed so keys (and anything saved with them) are stable between runs
+_rng = random.Random(20240601)
+
+def _random_key():
+    return _rng.getrandbits(64)
+
+# PIECE_KEYS[color][piece_type][square]
+PIECE_KEYS = [[[_random_key() for _ in chess.SQUARES] for _ in range(7)] for _ in chess.COLORS]
+CASTLING_KEYS = {square: _random_key() for square in (chess.A1, chess.H1, chess.A8, chess.H8)}
+EP_KEYS = [_random_key() for _ in range(8)]
+TURN_KEY = _random_key()
+
+
+def castling_key(castling_rights):
+    key = 0
+    for square, value in CASTLING_KEYS.items():
+        if castling_rights & chess.BB_SQUARES[square]:
+            key ^= value
+    return key
+
+
+def ep_key(ep_square):
+    return EP_KEYS[chess.square_file(ep_square)] if ep_square is not None else 0
+
+
+def hash_board(board):
+    # full 64-bit hash, used once per root position
+    key = 0
+    for square, piece in board.piece_map().items():
+        key ^= PIECE_KEYS[piece.color][piece.piece_type][square]
+    key ^= castling_key(board.castling_rights)
+    key ^= ep_key(board.ep_square)
+    if board.turn == chess.WHITE:
+        key ^= TURN_KEY
+    return key
@@ -1,17 +1,25 @@
+import os
 import pygame
 import sys
 import random
 import threading
+import time
 import chess
 import settings
 from assets.assets import AssetManager
 from logic.board import Board
-from logic.agents import RandomBot, MinimaxBot
+from logic.frames import FrameProfiler
+from logic.records import GameRecorder
+from logic.agents import RandomBot, MinimaxBot, UciAgent, CancelToken
+from logic.stats import JsonLinesLog
+
+# posted by the agent thread when its move is ready
+AGENT_DONE = pygame.USEREVENT + 1
 
 # MAIN GAME
 
 class ChessGame:
-    def __init__(self, white_agent=None, black_agent=None):
+    def __init__(self, white_agent=None, black_agent=None, base_time=None, increment=0):
         
         pygame.init()
         pygame.mixer.init()
@@ -46,29 +54,75 @@ class ChessGame:
         self.drag_piece_data = None
         self.clicked_selected = False
         
+        # clocks (base_time None plays untimed)
+        self.base_time = base_time
+        self.increment = increment
+        self.time_left = {chess.WHITE: base_time, chess.BLACK: base_time}
+        self.turn_start = time.perf_counter()
+        self.flagged = None
+        
+        # finished games are appended to the record file, if one is set
+        self.time_used = {chess.WHITE: 0.0, chess.BLACK: 0.0}
+        self.recorded = False
+        
         # threading state
         self.agent_thinking = False
         self.agent_move_result = None
         self.agent_thread = None
+        self.agent_token = None
+        self.thinking_agent = None
+        
+        # search stats overlay, showing the last bot that searched
+        self.show_stats = settings.STATS_OVERLAY
+        self.stats_agent = None
+        self.stats_font = None
+        self.stats_rect = None
+        
+        # frame timing, with its own overlay and an optional cProfile capture
+        self.frames = FrameProfiler(settings.FPS, settings.FRAME_WINDOW)
+        self.show_frames = settings.FRAME_OVERLAY
+        self.frames_rect = None
         
         # layout
         self.sq_size = 0
         self.board_x = 0
         self.board_y = 0
         self.coord_font = None
+        self.clock_font = None
+        self.clock_bar = 0
+        
+        # render caches
+        self.board_surface = None
+        self.coord_labels = {}
+        self.hint_move = None
+        self.hint_capture = None
+        self.square_cache = {}
+        self.drag_rect = None
+        self.dirty_rects = []
+        self.needs_full_redraw = True
+        self.needs_redraw = True
+        
+        # debounced window resize
+        self.pending_resize = None
+        self.resize_at = 0
         
         self._recalculate_layout(settings.WIDTH, settings.HEIGHT)
 
     def _recalculate_layout(self, w, h):
-        min_dim = min(w, h)
+        # leave a bar above and below the board for the clocks
+        self.clock_bar = int(h * settings.CLOCK_BAR) if self.base_time is not None else 0
+        min_dim = min(w, h - 2 * self.clock_bar)
         self.sq_size = min_dim // 8
         self.board_x = (w - (self.sq_size * 8)) // 2
         self.board_y = (h - (self.sq_size * 8)) // 2
         
         self.coord_font = pygame.font.SysFont('Arial', int(self.sq_size * 0.18), bold=True)
+        self.clock_font = pygame.font.SysFont('Arial', max(int(self.clock_bar * 0.7), 1), bold=True)
+        self.stats_font = pygame.font.SysFont('Consolas', max(int(self.sq_size * 0.2), 8))
         
         # resize images
         self.assets.rescale_images(self.sq_size)
+        self._build_static_layers()
 
     def _deselect(self):
         self.selected_square = None
@@ -89,9 +143,35 @@ class ChessGame:
                 return (row, col)
         return None
 
+    def _agent_result(self):
+        # a game an agent ended itself, e.g. a server bot that flagged
+        for agent in (self.white_agent, self.black_agent):
+            if agent and agent.result:
+                return agent.result
+        return None
+
+    def _is_game_over(self):
+        return self.flagged is not None or self._agent_result() is not None or self.board.is_game_over()
+
+    def _clock_remaining(self, color):
+        # time left including the running turn
+        remaining = self.time_left[color]
+        if color == self.board.is_turn and not self._is_game_over():
+            remaining -= time.perf_counter() - self.turn_start
+        return max(remaining, 0)
+
+    def _update_clocks(self):
+        if self.base_time is None or self._is_game_over(): return
+        color = self.board.is_turn
+        if self._clock_remaining(color) <= 0:
+            self.time_left[color] = 0
+            self.flagged = color
+            self._stop_agents()
+            self._record_game()
+
     def _handle_click(self, pos):
         # checks
-        if self.board.is_game_over(): return
+        if self._is_game_over(): return
 
         coords = self._get_board_pos(pos)
         if not coords:
@@ -129,161 +209,454 @@ class ChessGame:
             if self.clicked_selected: self._deselect()
 
     def _execute_move(self, start, end):
+        # charge the mover's clock before the turn changes
+        color = self.board.is_turn
+        if self.base_time is not None:
+            self.time_left[color] = self._clock_remaining(color) + self.increment
+        self.time_used[color] += time.perf_counter() - self.turn_start
+        self.turn_start = time.perf_counter()
+        
         is_capture = self.board.move_piece(start, end)
         self.assets.play_sound('capture' if is_capture else 'move')
         self._deselect()
+        if self._is_game_over():
+            self._record_game()
+
+    def _record_game(self):
+        if self.recorded or not settings.RECORD_PATH: return
+        self.recorded = True
+        
+        engine = self.board.engine
+        if self.flagged is not None:
+            result = '0-1' if self.flagged == chess.WHITE else '1-0'
+        else:
+            result = self._agent_result() or engine.result()
+        names = ['Human' if agent is None else type(agent).__name__ for agent in (self.white_agent, self.black_agent)]
+        recorder = GameRecorder(settings.RECORD_PATH)
+        recorder.record(engine, names[0], names[1], result, self.time_used[chess.WHITE], self.time_used[chess.BLACK])
+        recorder.close()
 
-    def _run_agent_move(self, agent):
-        # runs in separate thread
+    def _run_agent_move(self, agent, token):
+        # runs in separate thread, wakes the main loop when done
         try:
-            move = agent.get_move(self.board)
+            move = agent.get_move(self.board, token)
             self.agent_move_result = move
         except Exception as e:
             print(f"agent error: {e}")
             self.agent_move_result = None
+        pygame.event.post(pygame.event.Event(AGENT_DONE))
+
+    def _start_agent(self):
+        current_agent = self.white_agent if self.board.is_turn else self.black_agent
+        if current_agent is None or self.agent_thinking or self._is_game_over(): return
+        
+        if self.base_time is not None:
+            current_agent.set_clock(self._clock_remaining(self.board.is_turn), self.increment)
+        self.agent_thinking = True
+        self.thinking_agent = current_agent
+        if hasattr(current_agent, 'stats'):
+            self.stats_agent = current_agent
+        self.agent_token = CancelToken()
+        self.agent_thread = threading.Thread(target=self._run_agent_move, args=(current_agent, self.agent_token), daemon=True)
+        self.agent_thread.start()
+
+    def _finish_agent(self):
+        self.agent_thread.join()
+        if self.agent_move_result and not self._is_game_over() and not self.agent_token.cancelled:
+            start, end = self.agent_move_result
+            self._execute_move(start, end)
+            # think on the opponent's time
+            if not self._is_game_over():
+                self.thinking_agent.ponder(self.board)
+        self.agent_thinking = False
+        self.agent_move_result = None
+        self.thinking_agent = None
+
+    def _stop_agents(self):
+        # cancel the running search and any pondering, without waiting for the move
+        if self.agent_token:
+            self.agent_token.cancel()
+        for agent in (self.white_agent, self.black_agent):
+            if agent: agent.stop()
+
+    def _quit(self):
+        self.frames.stop_capture()
+        if settings.FRAME_DUMP:
+            self.frames.dump(settings.FRAME_DUMP)
+        self._stop_agents()
+        if self.agent_thread:
+            self.agent_thread.join(1.0)
+        for agent in (self.white_agent, self.black_agent):
+            if hasattr(agent, 'close'): agent.close()
+        pygame.quit()
+        sys.exit()
+
+    def _wait_timeout(self):
+        # ms until the clock text next changes or a resize settles, None when nothing is pending
+        timeouts = []
+        if self.pending_resize is not None:
+            timeouts.append(max(int((self.resize_at - time.perf_counter()) * 1000) + 1, 1))
+        if self.base_time is not None and not self._is_game_over():
+            remaining = self._clock_remaining(self.board.is_turn)
+            step = 0.1 if remaining < 10 else 1.0
+            timeouts.append(max(int((remaining % step) * 1000) + 1, 1))
+        if self.show_stats and self.agent_thinking and self.stats_agent:
+            timeouts.append(settings.STATS_REFRESH_MS)
+        if self.show_frames:
+            timeouts.append(settings.FRAME_REFRESH_MS)
+        if self.frames.profile:
+            timeouts.append(int(self.frames.capture_remaining() * 1000) + 1)
+        return min(timeouts) if timeouts else None
+
+    def _apply_resize(self):
+        if self.pending_resize is None or time.perf_counter() < self.resize_at: return
+        w, h = self.pending_resize
+        self.pending_resize = None
+        self.screen = pygame.display.set_mode((w, h), pygame.RESIZABLE)
+        self._recalculate_layout(w, h)
 
     def run(self):
+        frames = self.frames
+        frames.start_frame()
         while True:
-            # check turn
-            is_white = self.board.is_turn
-            current_agent = self.white_agent if is_white else self.black_agent
+            self._update_clocks()
+            self._apply_resize()
+            self._start_agent()
+            frames.mark('update')
             
-            # event loop
-            for event in pygame.event.get():
+            # draw only when something changed
+            if self.needs_redraw:
+                self._draw()
+                self.needs_redraw = False
+                self.clock.tick(settings.FPS)
+                frames.mark('tick')
+            frames.end_frame()
+            
+            # sleep until input, an agent move or the next clock tick
+            timeout = self._wait_timeout()
+            event = pygame.event.wait(timeout) if timeout is not None else pygame.event.wait()
+            frames.start_frame()
+            events = [event] + pygame.event.get()
+            
+            # human input
+            # only allow if it's human turn (agent is None) and not waiting for thread
+            current_agent = self.white_agent if self.board.is_turn else self.black_agent
+            human_turn = current_agent is None and not self.agent_thinking
+            
+            for event in events:
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self._quit()
+                elif event.type == pygame.NOEVENT:
+                    # clock tick
+                    self.needs_redraw = True
+                elif event.type == AGENT_DONE:
+                    self._finish_agent()
+                    self.needs_redraw = True
                 elif event.type == pygame.VIDEORESIZE:
-                    self._recalculate_layout(event.w, event.h)
-                    self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                    # a window drag sends many of these, relayout once it settles
+                    self.pending_resize = (event.w, event.h)
+                    self.resize_at = time.perf_counter() + settings.RESIZE_DEBOUNCE_MS / 1000
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.needs_full_redraw = True
+                    self.needs_redraw = True
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_f: self.flip_view = not self.flip_view
-                
-                # human input
-                # only allow if it's human turn (agent is None) and not waiting for thread
-                if current_agent is None and not self.agent_thinking and not self.board.is_game_over():
+                    if event.key == pygame.K_f:
+                        self.flip_view = not self.flip_view
+                        self._build_static_layers()
+                    elif event.key == pygame.K_s:
+                        self.show_stats = not self.show_stats
+                        self.needs_redraw = True
+                    elif event.key == pygame.K_t:
+                        self.show_frames = not self.show_frames
+                        self.needs_redraw = True
+                    elif event.key == pygame.K_p:
+                        path = os.path.join(settings.PROFILE_DIR, time.strftime("frames-%Y%m%d-%H%M%S.prof"))
+                        frames.start_capture(settings.PROFILE_SECONDS, path)
+                        self.needs_redraw = True
+                elif human_turn and not self._is_game_over():
                     if event.type == pygame.MOUSEBUTTONDOWN:
                         self._handle_click(event.pos)
+                        self.needs_redraw = True
                     elif event.type == pygame.MOUSEBUTTONUP:
                         self._handle_release()
+                        self.needs_redraw = True
+                    elif event.type == pygame.MOUSEMOTION and self.is_dragging:
+                        self.needs_redraw = True
+            frames.mark('events')
 
-            # agent logic
-            if current_agent is not None and not self.board.is_game_over():
-                if not self.agent_thinking:
-                    # start thinking
-                    self.agent_thinking = True
-                    self.agent_thread = threading.Thread(target=self._run_agent_move, args=(current_agent,))
-                    self.agent_thread.start()
-                
-                # check if done
-                if not self.agent_thread.is_alive():
-                    if self.agent_move_result:
-                        start, end = self.agent_move_result
-                        self._execute_move(start, end)
-                    self.agent_thinking = False
-                    self.agent_move_result = None
-
-            # draw
-            self.screen.fill(settings.BACKGROUND)
-            self._draw_board()
-            self._draw_hints()
-            self._draw_pieces()
-            
-            pygame.display.flip()
-            self.clock.tick(settings.FPS)
+    def _square_rect(self, r, c):
+        dr = 7 - r if self.flip_view else r
+        dc = 7 - c if self.flip_view else c
+        return pygame.Rect(self.board_x + dc * self.sq_size, self.board_y + dr * self.sq_size, self.sq_size, self.sq_size)
 
-    def _draw_board(self):
+    def _build_static_layers(self):
+        # tiles and coordinate labels are pre-rendered once per resize/flip
+        size = self.sq_size
+        self.board_surface = pygame.Surface((size * 8, size * 8))
+        self.coord_labels = {}
+        pad = int(size * 0.03)
+        
         for r in range(8):
             for c in range(8):
                 dr = 7 - r if self.flip_view else r
                 dc = 7 - c if self.flip_view else c
-                x = self.board_x + dc * self.sq_size
-                y = self.board_y + dr * self.sq_size
                 
                 # tile colors
                 color = settings.LIGHT_BROWN if (r+c)%2==0 else settings.DARK_BROWN
+                pygame.draw.rect(self.board_surface, color, (dc * size, dr * size, size, size))
                 
-                # last move highlight
-                if self.board.last_move:
-                    if (r,c) == self.board.last_move[0]: color = settings.SOURCE_COLOR
-                    elif (r,c) == self.board.last_move[1]: color = settings.DEST_COLOR
-                
-                # selection highlight
-                if self.selected_square == (r,c): color = settings.SELECTED_COLOR
-                
-                # check highlight
-                if self.board.is_in_check():
-                    king_pos = self.board.get_king_pos()
-                    if king_pos == (r, c):
-                        color = settings.CHECK_COLOR
-
-                pygame.draw.rect(self.screen, color, (x, y, self.sq_size, self.sq_size))
-                
-                # coordinates
+                # coordinates, kept per square so highlights can redraw them
                 txt_color = settings.DARK_BROWN if (r+c)%2==0 else settings.LIGHT_BROWN
-                pad = int(self.sq_size * 0.03)
-                
-                if dc == 7: 
+                labels = []
+                if dc == 7:
                     lbl = self.coord_font.render(str(8-r), True, txt_color)
-                    self.screen.blit(lbl, (x + self.sq_size - lbl.get_width() - pad, y + pad))
-                if dr == 7: 
+                    labels.append((lbl, (size - lbl.get_width() - pad, pad)))
+                if dr == 7:
                     lbl = self.coord_font.render(chr(ord('a')+c), True, txt_color)
-                    self.screen.blit(lbl, (x + pad, y + self.sq_size - lbl.get_height() - pad))
-
-    def _draw_hints(self):
-        for (r, c) in self.valid_moves:
-            dr = 7 - r if self.flip_view else r
-            dc = 7 - c if self.flip_view else c
-            x = self.board_x + dc * self.sq_size
-            y = self.board_y + dr * self.sq_size
-            
-            target = self.board.get_piece_at(r, c)
-            s = pygame.Surface((self.sq_size, self.sq_size), pygame.SRCALPHA)
-            
-            if not target:
-                rad = int(self.sq_size * 0.125)
-                pygame.draw.circle(s, settings.HINT_COLOR, (self.sq_size//2, self.sq_size//2), rad)
-            else:
-                tl = int(self.sq_size * 0.2)
-                w, h = self.sq_size, self.sq_size
-                pygame.draw.polygon(s, settings.HINT_COLOR, [(0,0), (tl,0), (0,tl)])
-                pygame.draw.polygon(s, settings.HINT_COLOR, [(w,0), (w-tl,0), (w,tl)])
-                pygame.draw.polygon(s, settings.HINT_COLOR, [(0,h), (0,h-tl), (tl,h)])
-                pygame.draw.polygon(s, settings.HINT_COLOR, [(w,h), (w-tl,h), (w,h-tl)])
-            self.screen.blit(s, (x, y))
-
-    def _draw_pieces(self):
-        mx, my = pygame.mouse.get_pos()
-        is_checkmate = self.board.is_checkmate()
+                    labels.append((lbl, (pad, size - lbl.get_height() - pad)))
+                for lbl, (lx, ly) in labels:
+                    self.board_surface.blit(lbl, (dc * size + lx, dr * size + ly))
+                if labels:
+                    self.coord_labels[(r, c)] = labels
+        
+        # move hints
+        self.hint_move = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(self.hint_move, settings.HINT_COLOR, (size//2, size//2), int(size * 0.125))
+        self.hint_capture = pygame.Surface((size, size), pygame.SRCALPHA)
+        tl = int(size * 0.2)
+        for poly in ([(0,0), (tl,0), (0,tl)], [(size,0), (size-tl,0), (size,tl)],
+                     [(0,size), (0,size-tl), (tl,size)], [(size,size), (size-tl,size), (size,size-tl)]):
+            pygame.draw.polygon(self.hint_capture, settings.HINT_COLOR, poly)
+        
+        self.needs_full_redraw = True
+        self.needs_redraw = True
+
+    def _square_states(self):
+        # what each square shows this frame: (highlight, piece, hint, mated king)
+        last = self.board.last_move
+        hints = set(self.valid_moves)
+        dragged = self.drag_piece_data['pos'] if self.is_dragging and self.drag_piece_data else None
         
+        # one check test per frame instead of one per square
+        check_pos = self.board.get_king_pos() if self.board.is_in_check() else None
+        is_checkmate = check_pos is not None and self.board.is_checkmate()
+        
+        states = {}
         for r in range(8):
             for c in range(8):
+                color = None
+                if last:
+                    if (r,c) == last[0]: color = settings.SOURCE_COLOR
+                    elif (r,c) == last[1]: color = settings.DEST_COLOR
+                if self.selected_square == (r,c): color = settings.SELECTED_COLOR
+                if check_pos == (r,c): color = settings.CHECK_COLOR
+                
                 piece = self.board.get_piece_at(r, c)
-                if piece:
-                    if self.is_dragging and self.drag_piece_data['pos'] == (r, c): continue
-                    
-                    dr = 7 - r if self.flip_view else r
-                    dc = 7 - c if self.flip_view else c
-                    x = self.board_x + dc * self.sq_size
-                    y = self.board_y + dr * self.sq_size
-                    
-                    img = self.assets.get_image(piece)
-                    
-                    # rotate king if checkmate
-                    if is_checkmate and piece.lower() == 'k' and self.board.is_piece_turn(piece):
-                        img = pygame.transform.rotate(img, 90)
-                        new_rect = img.get_rect(center=(x + self.sq_size//2, y + self.sq_size//2))
-                        self.screen.blit(img, new_rect)
-                    else:
-                        if img: self.screen.blit(img, (x, y))
+                hint = None
+                if (r,c) in hints:
+                    hint = 'capture' if piece else 'move'
+                if dragged == (r,c):
+                    piece = None
+                mated = bool(is_checkmate and piece and piece.lower() == 'k' and self.board.is_piece_turn(piece))
+                states[(r,c)] = (color, piece, hint, mated)
+        return states
 
-        if self.is_dragging and self.drag_piece_data:
-            piece = self.drag_piece_data['symbol']
+    def _draw(self):
+        # repaint only squares whose state changed, then update those rects
+        self.dirty_rects = []
+        if self.needs_full_redraw:
+            self.screen.fill(settings.BACKGROUND)
+            self.square_cache = {}
+            self.drag_rect = None
+            self.dirty_rects.append(self.screen.get_rect())
+            self.needs_full_redraw = False
+        
+        states = self._square_states()
+        
+        # squares under last frame's dragged piece or panels need repainting too
+        forced = set()
+        for rect in (self.drag_rect, self.stats_rect, self.frames_rect):
+            if rect:
+                self.screen.fill(settings.BACKGROUND, rect)
+                self.dirty_rects.append(rect)
+                forced |= {sq for sq in states if self._square_rect(*sq).colliderect(rect)}
+        
+        dirty = [sq for sq, state in states.items() if sq in forced or self.square_cache.get(sq) != state]
+        frames = self.frames
+        frames.mark('states')
+        self._draw_board(dirty, states)
+        frames.mark('board')
+        self._draw_hints(dirty, states)
+        frames.mark('hints')
+        self._draw_pieces(dirty, states)
+        frames.mark('pieces')
+        self._draw_clocks()
+        self._draw_stats()
+        self._draw_frames()
+        self._draw_drag()
+        self.square_cache = states
+        frames.mark('overlays')
+        
+        pygame.display.update(self.dirty_rects)
+        frames.mark('display')
+
+    def _draw_board(self, dirty, states):
+        for sq in dirty:
+            rect = self._square_rect(*sq)
+            self.screen.blit(self.board_surface, rect, rect.move(-self.board_x, -self.board_y))
+            
+            # highlights go over the cached tile, labels back on top
+            color = states[sq][0]
+            if color:
+                self.screen.fill(color, rect)
+                for lbl, (lx, ly) in self.coord_labels.get(sq, ()):
+                    self.screen.blit(lbl, (rect.x + lx, rect.y + ly))
+            self.dirty_rects.append(rect)
+
+    def _draw_hints(self, dirty, states):
+        for sq in dirty:
+            hint = states[sq][2]
+            if hint:
+                img = self.hint_capture if hint == 'capture' else self.hint_move
+                self.screen.blit(img, self._square_rect(*sq))
+
+    def _draw_pieces(self, dirty, states):
+        for sq in dirty:
+            _, piece, _, mated = states[sq]
+            if not piece: continue
+            
+            rect = self._square_rect(*sq)
             img = self.assets.get_image(piece)
+            
+            # rotate king if checkmate
+            if mated:
+                img = self.assets.get_rotated_image(piece, 90)
+                self.screen.blit(img, img.get_rect(center=rect.center))
+            else:
+                if img: self.screen.blit(img, rect)
+
+    def _draw_drag(self):
+        self.drag_rect = None
+        if self.is_dragging and self.drag_piece_data:
+            img = self.assets.get_image(self.drag_piece_data['symbol'])
             if img:
-                rect = img.get_rect(center=(mx, my))
+                rect = img.get_rect(center=pygame.mouse.get_pos())
                 self.screen.blit(img, rect)
+                self.drag_rect = rect.clip(self.screen.get_rect())
+                self.dirty_rects.append(self.drag_rect)
+
+    def _draw_clocks(self):
+        if self.base_time is None: return
+        
+        # the player at the bottom of the view gets the lower bar
+        bottom = chess.BLACK if self.flip_view else chess.WHITE
+        right = self.board_x + self.sq_size * 8
+        w = self.screen.get_width()
+        for bar_y in (self.board_y - self.clock_bar, self.board_y + self.sq_size * 8):
+            bar = pygame.Rect(0, bar_y, w, self.clock_bar)
+            self.screen.fill(settings.BACKGROUND, bar)
+            self.dirty_rects.append(bar)
+        
+        for color in (chess.WHITE, chess.BLACK):
+            remaining = self._clock_remaining(color)
+            minutes, seconds = divmod(remaining, 60)
+            if remaining < 10:
+                text = f"{int(minutes)}:{seconds:04.1f}"
+            else:
+                text = f"{int(minutes)}:{int(seconds):02d}"
+            
+            if remaining < 10:
+                txt_color = settings.CLOCK_LOW_COLOR
+            elif color == self.board.is_turn and not self._is_game_over():
+                txt_color = settings.CLOCK_ACTIVE_COLOR
+            else:
+                txt_color = settings.CLOCK_IDLE_COLOR
+            
+            lbl = self.clock_font.render(text, True, txt_color)
+            if color == bottom:
+                y = self.board_y + self.sq_size * 8 + (self.clock_bar - lbl.get_height()) // 2
+            else:
+                y = self.board_y - self.clock_bar + (self.clock_bar - lbl.get_height()) // 2
+            self.screen.blit(lbl, (right - lbl.get_width(), y))
+
+    def _stats_lines(self, stats):
+        if stats.source != 'search':
+            return [f"{stats.source} move", "pv " + " ".join(move.uci() for move in stats.pv)]
+        score = stats.score_cp(stats.score)
+        iterations = " ".join(f"{it['depth']}:{it['time']:.2f}s" for it in stats.iterations[-4:])
+        return [
+            f"depth {stats.depth}  score {score if score is not None else '-'}",
+            f"nodes {stats.nodes:,}  q {stats.qnodes:,}",
+            f"{stats.nps:,.0f} nps  ebf {stats.branching_factor:.2f}",
+            f"cutoffs {stats.cutoff_rate:.0%}  first {stats.first_cutoff_rate:.0%}",
+            f"tt hits {stats.tt_hit_rate:.0%}  tt cuts {stats.tt_cutoffs:,}",
+            f"time {stats.elapsed:.2f}s  {iterations}",
+            "pv " + " ".join(move.uci() for move in stats.pv[:6]),
+        ]
+
+    def _draw_stats(self):
+        self.stats_rect = None
+        stats = self.stats_agent.stats if self.stats_agent else None
+        if not self.show_stats or stats is None: return
+        
+        # counters are read live from the searching thread
+        if self.agent_thinking and not stats.done:
+            stats.sample(self.stats_agent)
+        
+        pad = max(self.sq_size // 10, 2)
+        panel = self._render_panel(self._stats_lines(stats), pad)
+        rect = panel.get_rect(topleft=(self.board_x + pad, self.board_y + pad))
+        self.screen.blit(panel, rect)
+        self.stats_rect = rect.clip(self.screen.get_rect())
+        self.dirty_rects.append(self.stats_rect)
+
+    def _render_panel(self, lines, pad):
+        labels = [self.stats_font.render(line, True, settings.STATS_TEXT_COLOR) for line in lines]
+        w = max(lbl.get_width() for lbl in labels) + 2 * pad
+        h = sum(lbl.get_height() for lbl in labels) + 2 * pad
+        panel = pygame.Surface((w, h), pygame.SRCALPHA)
+        panel.fill(settings.STATS_PANEL_COLOR)
+        y = pad
+        for lbl in labels:
+            panel.blit(lbl, (pad, y))
+            y += lbl.get_height()
+        return panel
+
+    def _frame_lines(self, summary):
+        phases = summary['phases']
+        def p95(*names):
+            return "  ".join(f"{name} {phases[name]['p95_ms']:.1f}" for name in names)
+        lines = [
+            f"frame p50 {summary['p50_ms']:.1f}  p95 {summary['p95_ms']:.1f}  p99 {summary['p99_ms']:.1f} ms",
+            f"dropped {summary['window_dropped']}/{summary['window']}  ({summary['dropped']} of {summary['frames']})",
+            f"gil stall p95 {summary['stall_p95_ms']:.1f} ms",
+            "p95 " + p95('events', 'update', 'states'),
+            "p95 " + p95('board', 'hints', 'pieces'),
+            "p95 " + p95('overlays', 'display'),
+        ]
+        if self.frames.profile:
+            lines.append(f"profiling {self.frames.capture_remaining():.1f}s")
+        return lines
+
+    def _draw_frames(self):
+        # frame times up to the previous frame, top right of the board
+        self.frames_rect = None
+        if not self.show_frames: return
+        
+        pad = max(self.sq_size // 10, 2)
+        panel = self._render_panel(self._frame_lines(self.frames.summary()), pad)
+        rect = panel.get_rect(topright=(self.board_x + self.sq_size * 8 - pad, self.board_y + pad))
+        self.screen.blit(panel, rect)
+        self.frames_rect = rect.clip(self.screen.get_rect())
+        self.dirty_rects.append(self.frames_rect)
 
 if __name__ == "__main__":
-    game = ChessGame(white_agent=MinimaxBot(3), black_agent=RandomBot(0))
+    stats_log = JsonLinesLog(settings.STATS_LOG) if settings.STATS_LOG else None
+    if settings.UCI_ENGINE:
+        # searches in its own process, the gui thread only waits on a pipe
+        white_agent = UciAgent(settings.UCI_ENGINE, cwd=settings.BASE_DIR)
+    else:
+        white_agent = MinimaxBot(8, time_limit=5, on_stats=stats_log, ponder=settings.PONDER)
+    game = ChessGame(white_agent=white_agent, black_agent=RandomBot(0),
+                     base_time=settings.CLOCK_BASE, increment=settings.CLOCK_INCREMENT)
     game.run()
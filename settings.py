@@ -6,12 +6,49 @@ import os
 WIDTH = 640
 HEIGHT = 640
 FPS = 60
+CLOCK_BAR = 0.05  # height of each clock bar, as a fraction of the window
+RESIZE_DEBOUNCE_MS = 150  # relayout once the window stops changing size
+
+# clocks (seconds)
+CLOCK_BASE = 300
+CLOCK_INCREMENT = 3
 
 # paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 IMAGE_DIR = os.path.join(ASSETS_DIR, "images")
 SOUND_DIR = os.path.join(ASSETS_DIR, "sounds")
+ATLAS_PATH = os.path.join(ASSETS_DIR, "atlas.bin")  # pre-scaled pieces, rebuilt when a png changes
+
+# sprite caches
+ATLAS_PIECE_SIZE = 256
+SCALE_CACHE_SIZE = 8  # square sizes kept scaled
+
+# bots
+PONDER = False  # let the bot think on the opponent's time
+# uci engine command playing white instead of the in-process bot, e.g.
+# 'python -m logic.uci "MinimaxBot(8, time_limit=5)"' or "stockfish"
+UCI_ENGINE = None
+
+# game server for client.py, see logic/server.py
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+
+# game records (None to not record), see logic/records.py
+RECORD_PATH = None  # e.g. os.path.join(BASE_DIR, "games.bin")
+
+# search statistics
+STATS_OVERLAY = False  # toggled in game with S
+STATS_REFRESH_MS = 250  # overlay refresh while a bot thinks
+STATS_LOG = None  # json lines file for every search report, e.g. "search.jsonl"
+
+# frame timing, see logic/frames.py
+FRAME_OVERLAY = False  # toggled in game with T
+FRAME_REFRESH_MS = 500  # overlay refresh
+FRAME_WINDOW = 600  # frames kept for percentiles and the dump
+FRAME_DUMP = None  # written on quit, .csv per frame or .json with the summary, e.g. "frames.json"
+PROFILE_SECONDS = 5  # cProfile capture started in game with P
+PROFILE_DIR = BASE_DIR
 
 # colors
 WHITE = (255, 255, 255)
@@ -24,4 +61,9 @@ SELECTED_COLOR = (100, 109, 64)
 HINT_COLOR = (100, 109, 64, 128)
 SOURCE_COLOR = (206, 210, 107)
 DEST_COLOR = (170, 162, 58)
-CHECK_COLOR = (255, 0, 0)
\ No newline at end of file
+CHECK_COLOR = (255, 0, 0)
+CLOCK_ACTIVE_COLOR = (235, 235, 235)
+CLOCK_IDLE_COLOR = (120, 120, 120)
+CLOCK_LOW_COLOR = (230, 70, 60)
+STATS_PANEL_COLOR = (20, 20, 20, 200)
+STATS_TEXT_COLOR = (235, 235, 235)
\ No newline at end of file
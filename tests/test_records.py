@@ -0,0 +1,23 @@
+import os
+import sys
+import chess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logic.records import GameRecorder, GameStore
+
+
+def test_long_non_ascii_name_round_trip(tmp_path):
+    path = str(tmp_path / "games.bin")
+    engine = chess.Board()
+    for uci in ("e2e4", "e7e5", "g1f3"):
+        engine.push_uci(uci)
+    recorder = GameRecorder(path)
+    recorder.record(engine, 'é' * 200, 'Бот' * 100, '*')
+    recorder.close()
+
+    store = GameStore(path)
+    header = store.header(0)
+    assert header['white'] == 'é' * 127
+    assert len(header['black'].encode()) <= 255 and ('Бот' * 100).startswith(header['black'])
+    assert [move.uci() for move in store.moves(0)] == ["e2e4", "e7e5", "g1f3"]
+    assert store.to_pgn(0).headers['White'] == 'é' * 127
+    store.close()
\ No newline at end of file